@@ -0,0 +1,13 @@
+from rest_framework import filters
+
+from courses.search import search_courses
+
+
+class CourseSearchFilter(filters.SearchFilter):
+    """ Replaces the ILIKE based SearchFilter with the ranked full text search used by the catalog. """
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+        return search_courses(queryset, ' '.join(search_terms))
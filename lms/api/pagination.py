@@ -0,0 +1,56 @@
+from django.conf import settings
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from courses.pagination import KeysetPaginator, InvalidCursor
+
+
+class KeysetPagination(BasePagination):
+    """ Cursor pagination on (created_at, id), or on the search rank when ?search= is used.
+        Uses the same KeysetPaginator as the html catalog, no OFFSET and no COUNT. """
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 10)
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view= None):
+        self.request = request
+        paginator = KeysetPaginator(queryset, self.page_size)
+        try:
+            self.page = paginator.get_page(request.query_params.get(self.cursor_query_param))
+        except InvalidCursor as exc:
+            raise NotFound(str(exc))
+        return self.page.object_list
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_link(self.page.next_cursor),
+            'previous': self.get_link(self.page.previous_cursor),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'The pagination cursor value.',
+            'schema': {'type': 'string'},
+        }]
@@ -1,7 +1,7 @@
 from django.shortcuts import get_object_or_404
 
 from rest_framework import permissions
-from enrollment.models import Enroll
+from enrollment.services import is_enrolled_in
 from courses.models import Course
 from discussion.models import Post
 
@@ -24,8 +24,8 @@ class IsEnrolledOrAuthor(permissions.BasePermission):
     def has_permission(self, request, view):
         # This check is for list and create actions.
         if view.action == 'create':
-            course = Course.objects.get(slug= view.kwargs['course_slug'])
-            return Enroll.objects.filter(student= request.user, course= course).exists()
+            course_id = get_object_or_404(Course.objects.values_list('id', flat= True), slug= view.kwargs['course_slug'])
+            return is_enrolled_in(request.user, course_id)
         return True
     
     def has_object_permission(self, request, view, obj):
@@ -47,8 +47,8 @@ class IsEnrolledOrPostAuthor(permissions.BasePermission):
             return True
         if not request.user.is_authenticated:
             return False
-        course = get_object_or_404(Course, slug= view.kwargs['course_slug'])
-        return Enroll.objects.filter(student= request.user, course= course).exists()
+        course_id = get_object_or_404(Course.objects.values_list('id', flat= True), slug= view.kwargs['course_slug'])
+        return is_enrolled_in(request.user, course_id)
     
     def has_object_permission(self, request, view, obj):
         if request.user.is_superuser:
@@ -69,15 +69,19 @@ class IsCourseInstructorOrAdmin(permissions.BasePermission):
             return request.user.is_instructor
         return True
     
-    def has_object_permission(self, request, obj, view):
+    def has_object_permission(self, request, view, obj):
         # Admins can do anything.
         if request.user.is_superuser:
             return True
         
+        # Any authenticated user can read a published course, drafts only their instructor.
+        if request.method in permissions.SAFE_METHODS:
+            return obj.is_published or obj.instructor == request.user
+
         # Check if the user is the instructor of this course.
         is_owner = obj.instructor == request.user
 
         # If trying to delete, check for enrollments.
-        if view.sction == 'delete':
-            return is_owner and obj.enroll_set.count() == 0
+        if view.action == 'destroy':
+            return is_owner and not obj.enrollments.exists()
         return is_owner
\ No newline at end of file
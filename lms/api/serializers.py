@@ -1,10 +1,16 @@
 from rest_framework import serializers
+from drf_spectacular.utils import extend_schema_field
 
 from courses.models import Category, Course, Module, Lesson, Review
 from enrollment.models import Enroll
+from courses.outline import get_course_outline
 from discussion.models import Post
 
 
+# Most completions one sync request may carry.
+COMPLETION_SYNC_MAX_ITEMS = 500
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -15,9 +21,12 @@ class CourseListSerializer(serializers.ModelSerializer):
     # Custom field to get instructor username
     instructor = serializers.CharField(source = 'instructor.username', read_only= True)
 
+    # Read from the stored aggregates on Course, no AVG query per course.
+    average_rating = serializers.FloatField(read_only= True)
+
     class Meta:
         model = Course
-        fields = ['id', 'title', 'slug', 'thumbnail', 'instructor']
+        fields = ['id', 'title', 'slug', 'thumbnail', 'instructor', 'average_rating', 'rating_count']
 
 
 class LessonSerializer(serializers.ModelSerializer):
@@ -40,27 +49,62 @@ class ModuleSerializer(serializers.ModelSerializer):
 class CourseDetailSerializer(serializers.ModelSerializer):
     instructor = serializers.CharField(source= 'instructor.username', read_only= True)
 
-    # This nests the ModuleSerializer, showing all modules for this course.
-    modules = ModuleSerializer(many= True, read_only= True)
+    # Same shape as ModuleSerializer, but read from the cached course outline instead of
+    # querying the modules and lessons again.
+    modules = serializers.SerializerMethodField()
 
     # This nests the CategorySerialier to show category details.
     category = CategorySerializer(read_only= True)
 
+    average_rating = serializers.FloatField(read_only= True)
+    rating_histogram = serializers.DictField(child= serializers.IntegerField(), read_only= True)
+
     class Meta:
         model = Course
-        fields = ['id', 'title', 'slug', 'description', 'thumbnail', 'instructor', 'category', 'modules']
+        fields = ['id', 'title', 'slug', 'description', 'thumbnail', 'instructor', 'category', 'modules',
+                  'average_rating', 'rating_count', 'rating_histogram']
+
+    @extend_schema_field(ModuleSerializer(many= True))
+    def get_modules(self, course):
+        lesson_fields = LessonSerializer.Meta.fields
+        return [
+            {
+                'id': module['id'],
+                'title': module['title'],
+                'slug': module['slug'],
+                'lessons': [{field: lesson[field] for field in lesson_fields} for lesson in module['lessons']],
+                'order': module['order'],
+            }
+            for module in get_course_outline(course)
+        ]
 
 
 class EnrolledCourseSerializer(serializers.ModelSerializer):
     # Nest he CourseDetailSerializer to show the course details.
     course = CourseDetailSerializer(read_only= True)
 
-    # Include progress percentage property from the model.
+    # Include progress percentage property from the model, computed from the stored counters.
     progress_percentage = serializers.ReadOnlyField()
 
     class Meta:
         model = Enroll
-        fields = ['course', 'progress_percentage']
+        fields = ['course', 'progress_percentage', 'total_lessons', 'completed_lessons']
+
+
+class LessonCompletionSerializer(serializers.Serializer):
+    lesson_id = serializers.IntegerField(min_value= 1)
+    completed_at = serializers.DateTimeField()
+
+
+class CompletionSyncSerializer(serializers.Serializer):
+    """ A batch of lesson completions recorded by an offline client. """
+    completions = LessonCompletionSerializer(many= True, allow_empty= False, max_length= COMPLETION_SYNC_MAX_ITEMS)
+
+
+class CompletionSyncResultSerializer(serializers.Serializer):
+    completed = serializers.ListField(child= serializers.IntegerField())
+    already_completed = serializers.ListField(child= serializers.IntegerField())
+    rejected = serializers.ListField(child= serializers.IntegerField())
 
 
 class ReviewSerializer(serializers.ModelSerializer):
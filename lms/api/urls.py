@@ -33,6 +33,7 @@ urlpatterns = [
     # API endpoints
     path('categories/', views.CategoryListAPIView.as_view(), name= 'category-list'),
     path('my_courses/', views.MyCoursesAPIView.as_view(), name= 'my-courses'),
+    path('my_courses/completions/sync/', views.CompletionSyncAPIView.as_view(), name= 'completion-sync'),
 
     path('', include(router.urls)),
     path('', include(courses_router.urls)),    
@@ -4,13 +4,19 @@ from django.db.models import Max
 from rest_framework import generics, filters, viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema
 
 from courses.models import Course, Category, Review, Module
 from enrollment.models import Enroll
+from enrollment.services import sync_lesson_completions
 from discussion.models import Post
 from .serializers import (CategorySerializer, CourseListSerializer, CourseDetailSerializer, ModuleSerializer,
                           EnrolledCourseSerializer, ReviewSerializer, PostSerializer, PostCreateSerializer, 
-                          ReplySerializer, CourseCreateUpdateSerializer)
+                          ReplySerializer, CourseCreateUpdateSerializer, CompletionSyncSerializer,
+                          CompletionSyncResultSerializer)
+from .filters import CourseSearchFilter
+from .pagination import KeysetPagination
 from .permissions import IsInstructorAndOwner, IsEnrolledOrAuthor, IsEnrolledOrPostAuthor, IsCourseInstructorOrAdmin
 
 # Create your views here.
@@ -33,12 +39,15 @@ class CourseViewSet(viewsets.ModelViewSet):
 
     # Because we added new backends, we need to specify which ones this view users.
     # Note: DjangoFilterBackends is already set as a default in settings.py.
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [CourseSearchFilter, filters.OrderingFilter]
+
+    # Cursor pagination on (created_at, id), shared with the html catalog.
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         # Only show published course in lists, but allow instructor to see their draft.
         if self.action == 'list' and not self.request.user.is_staff:
-            return Course.objects.filter(is_published= True)
+            return Course.objects.filter(is_published= True).select_related('instructor').defer('search_vector')
         return Course.objects.all()
 
     def get_serializer_class(self):
@@ -62,7 +71,26 @@ class MyCoursesAPIView(generics.ListAPIView):
 
     def get_queryset(self):
         # Filter the enrollments based on the currrently logged in user.
-        return Enroll.objects.filter(student= self.request.user)
+        return Enroll.objects.filter(student= self.request.user).select_related('course')
+
+
+class CompletionSyncAPIView(generics.GenericAPIView):
+    """ Uploads the lessons an offline client completed, in one request. Lessons that are unpublished or
+        not in a course the user is enrolled in are rejected, the rest are stored with their completed_at. """
+    serializer_class = CompletionSyncSerializer
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(responses= CompletionSyncResultSerializer)
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data= request.data)
+        serializer.is_valid(raise_exception= True)
+
+        completed, already_completed, rejected = sync_lesson_completions(request.user, [
+            (item['lesson_id'], item['completed_at']) for item in serializer.validated_data['completions']
+        ])
+        return Response(CompletionSyncResultSerializer({
+            'completed': completed, 'already_completed': already_completed, 'rejected': rejected,
+        }).data)
     
 
 class ModuleViewSet(viewsets.ModelViewSet):
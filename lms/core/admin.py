@@ -1,3 +1,9 @@
 from django.contrib import admin
+from core.models import SiteStat
 
 # Register your models here.
+
+@admin.register(SiteStat)
+class SiteStatAdmin(admin.ModelAdmin):
+    list_display= ('name', 'value', 'updated_at')
+    readonly_fields= ['updated_at']
@@ -1,3 +1,15 @@
 from django.db import models
 
 # Create your models here.
+
+class SiteStat(models.Model):
+    """ A denormalized site-wide counter (published courses, students, instructors). """
+    name = models.CharField(max_length= 50, unique= True)
+    value = models.BigIntegerField(default= 0)
+    updated_at = models.DateTimeField(auto_now= True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} : {self.value}"
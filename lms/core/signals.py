@@ -0,0 +1,72 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.contrib.auth import get_user_model
+
+from courses.models import Course
+from .stats import bump_site_stat, COURSE_COUNT, STUDENT_COUNT, INSTRUCTOR_COUNT
+
+
+User = get_user_model()
+
+USER_ROLE_STATS = (('is_student', STUDENT_COUNT), ('is_instructor', INSTRUCTOR_COUNT))
+
+
+# ------------- COURSE COUNTER ------------------------------------------------.
+
+@receiver(pre_save, sender= Course)
+def remember_course_published(sender, instance, **kwargs):
+    # Keep the stored flag so post_save only counts real transitions.
+    instance._was_published = False
+    if instance.pk:
+        instance._was_published = bool(
+            Course.objects.filter(pk= instance.pk).values_list('is_published', flat= True).first()
+        )
+
+
+@receiver(post_save, sender= Course)
+def update_course_count_on_save(sender, instance, **kwargs):
+    was_published = getattr(instance, '_was_published', False)
+    bump_site_stat(COURSE_COUNT, int(instance.is_published) - int(was_published))
+
+
+@receiver(post_delete, sender= Course)
+def update_course_count_on_delete(sender, instance, **kwargs):
+    if instance.is_published:
+        bump_site_stat(COURSE_COUNT, -1)
+
+
+# ------------- STUDENT / INSTRUCTOR COUNTERS ------------------------------------------------.
+
+def _touches_roles(update_fields):
+    return update_fields is None or any(field in update_fields for field, _ in USER_ROLE_STATS)
+
+
+@receiver(pre_save, sender= User)
+def remember_user_roles(sender, instance, update_fields= None, **kwargs):
+    # Logins save last_login only, skip the lookup for those.
+    instance._previous_roles = None
+    if not _touches_roles(update_fields):
+        return
+
+    instance._previous_roles = {field: False for field, _ in USER_ROLE_STATS}
+    if instance.pk:
+        previous = User.objects.filter(pk= instance.pk).values(*instance._previous_roles).first()
+        if previous:
+            instance._previous_roles = previous
+
+
+@receiver(post_save, sender= User)
+def update_role_counts_on_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_roles', None)
+    if previous is None:
+        return
+
+    for field, stat in USER_ROLE_STATS:
+        bump_site_stat(stat, int(getattr(instance, field)) - int(previous[field]))
+
+
+@receiver(post_delete, sender= User)
+def update_role_counts_on_delete(sender, instance, **kwargs):
+    for field, stat in USER_ROLE_STATS:
+        if getattr(instance, field):
+            bump_site_stat(stat, -1)
@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SiteStat
+
+
+COURSE_COUNT = 'course_count'
+STUDENT_COUNT = 'student_count'
+INSTRUCTOR_COUNT = 'instructor_count'
+
+STAT_NAMES = (COURSE_COUNT, STUDENT_COUNT, INSTRUCTOR_COUNT)
+
+SITE_STATS_CACHE_KEY = 'core:site_stats'
+
+
+def count_site_stats():
+    """ Runs the real COUNT(*) queries. Only used by the reconcile task, never by a request. """
+    from courses.models import Course
+    from users.models import MemberUser
+
+    return {
+        COURSE_COUNT: Course.objects.filter(is_published= True).count(),
+        STUDENT_COUNT: MemberUser.objects.filter(is_student= True).count(),
+        INSTRUCTOR_COUNT: MemberUser.objects.filter(is_instructor= True).count(),
+    }
+
+
+def reconcile_site_stats():
+    """ Rewrites every counter from the source tables, fixing any drift left by bulk updates. """
+    counts = count_site_stats()
+    for name, value in counts.items():
+        SiteStat.objects.update_or_create(name= name, defaults= {'value': value})
+
+    cache.set(SITE_STATS_CACHE_KEY, counts, timeout= None)
+    return counts
+
+
+def get_site_stats():
+    """ Returns all site counters as a dict, from the cache or a single primary key lookup. """
+    stats = cache.get(SITE_STATS_CACHE_KEY)
+    if stats is not None:
+        return stats
+
+    stats = dict(SiteStat.objects.filter(name__in= STAT_NAMES).values_list('name', 'value'))
+
+    # First run (or the table was truncated), build the counters once.
+    if len(stats) != len(STAT_NAMES):
+        return reconcile_site_stats()
+
+    cache.set(SITE_STATS_CACHE_KEY, stats, timeout= None)
+    return stats
+
+
+def bump_site_stat(name, delta):
+    """ Atomically adds delta to a counter and drops the cached copy. """
+    if not delta:
+        return
+
+    SiteStat.objects.filter(name= name).update(value= F('value') + delta, updated_at= timezone.now())
+    cache.delete(SITE_STATS_CACHE_KEY)
@@ -0,0 +1,10 @@
+from celery import shared_task
+
+from .stats import reconcile_site_stats
+
+
+@shared_task
+def task_reconcile_site_stats():
+    """Periodic task that recounts the site-wide stats and fixes any drift in the counters."""
+    counts = reconcile_site_stats()
+    return f"Site stats reconciled : {counts}"
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Course
+
+
+CAROUSEL_SIZE = 4
+CAROUSEL_CACHE_KEY = 'courses:carousel:{category_id}'
+
+# Only what a course card in main.html renders.
+CARD_FIELDS = ('id', 'title', 'slug', 'thumbnail', 'category_id', 'created_at', 'instructor__username')
+
+
+def carousel_cache_key(category_id):
+    return CAROUSEL_CACHE_KEY.format(category_id= category_id)
+
+
+def top_courses_per_category(category_ids, limit= CAROUSEL_SIZE):
+    """ Newest published courses of each category, using a single
+        ROW_NUMBER() OVER (PARTITION BY category ORDER BY created_at DESC) query. """
+    courses = Course.objects.filter(
+        is_published= True, category_id__in= category_ids
+    ).select_related('instructor').only(*CARD_FIELDS).annotate(
+        position= Window(
+            RowNumber(),
+            partition_by= [F('category_id')],
+            order_by= [F('created_at').desc(), F('id').desc()],
+        )
+    ).filter(position__lte= limit).order_by('category_id', 'position')
+
+    grouped = {category_id: [] for category_id in category_ids}
+    for course in courses:
+        grouped[course.category_id].append(course)
+    return grouped
+
+
+def get_category_carousel(categories):
+    """ Returns [(category, courses), ...] for the categories that have published courses.
+        Each category's cards are cached until one of its courses changes (see courses.signals). """
+    categories = list(categories)
+    keys = {category.id: carousel_cache_key(category.id) for category in categories}
+    cached = cache.get_many(keys.values())
+
+    missing = [category_id for category_id, key in keys.items() if key not in cached]
+    if missing:
+        fetched = top_courses_per_category(missing)
+        cache.set_many({keys[category_id]: courses for category_id, courses in fetched.items()}, timeout= None)
+        cached.update({keys[category_id]: courses for category_id, courses in fetched.items()})
+
+    return [(category, cached[keys[category.id]]) for category in categories if cached[keys[category.id]]]
+
+
+def invalidate_category_carousel(*category_ids):
+    keys = [carousel_cache_key(category_id) for category_id in set(category_ids) if category_id is not None]
+    if keys:
+        cache.delete_many(keys)
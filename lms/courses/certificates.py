@@ -0,0 +1,139 @@
+import hashlib
+import json
+import threading
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.template.loader import get_template, render_to_string
+from weasyprint import HTML, default_url_fetcher
+from weasyprint.text.fonts import FontConfiguration
+
+from enrollment.models import Enroll
+from users.models import UserLessonCompletion
+
+
+# Rendered certificates are stored under the hash of everything that goes into them: the student, the
+# course, the context rendered (name, title, completion date) and the template source. The same inputs
+# always give the same file, so a stored PDF never needs invalidating, a changed input is a new name.
+
+CERTIFICATE_TEMPLATE = 'courses/certificate.html'
+# Celery queue of courses.tasks.task_render_certificate, see CELERY_TASK_ROUTES.
+CERTIFICATE_QUEUE = 'certificates'
+# Held while a render is queued, so reloads and polls don't queue the same certificate again.
+CERTIFICATE_RENDER_LOCK_KEY = 'courses:certificate_render:{digest}'
+CERTIFICATE_RENDER_LOCK_TIMEOUT = 60 * 5
+
+
+def certificate_storage():
+    """ The STORAGES['certificates'] alias, kept out of MEDIA_ROOT which is served publicly. """
+    return storages['certificates']
+
+
+def template_hash():
+    return hashlib.sha256(get_template(CERTIFICATE_TEMPLATE).template.source.encode()).hexdigest()
+
+
+def completed_on(enrollment):
+    """ When the student completed their last published lesson of the course, stable across downloads
+        unlike the time of the request. """
+    last_completion = UserLessonCompletion.objects.filter(
+        student_id= enrollment.student_id, lesson__module__course_id= enrollment.course_id,
+        lesson__is_published= True, is_completed= True,
+    ).aggregate(last= Max('completed_at'))['last']
+    return last_completion or enrollment.enrolled_at
+
+
+def completed_enrollments(enrollments= None):
+    """ The enrollments of a completed course, annotated with completed_on (same date as completed_on()). """
+    last_completion = UserLessonCompletion.objects.filter(
+        student= OuterRef('student_id'), lesson__module__course= OuterRef('course_id'),
+        lesson__is_published= True, is_completed= True,
+    ).order_by('-completed_at').values('completed_at')[:1]
+
+    enrollments = Enroll.objects.all() if enrollments is None else enrollments
+    return enrollments.filter(total_lessons__gt= 0, completed_lessons__gte= F('total_lessons')).annotate(
+        completed_on= Coalesce(Subquery(last_completion), F('enrolled_at')))
+
+
+def certificate_context(enrollment):
+    student = enrollment.student
+    return {
+        'student_name': student.get_full_name() or student.username,
+        'course_title': enrollment.course.title,
+        'completion_date': completed_on(enrollment).strftime('%B %d, %Y'),
+    }
+
+
+class Certificate:
+    """ A certificate's stored name and ETag, computed without rendering anything. """
+
+    def __init__(self, enrollment):
+        self.context = certificate_context(enrollment)
+        key = json.dumps(
+            [enrollment.student_id, enrollment.course_id, self.context, template_hash()], sort_keys= True)
+        self.digest = hashlib.sha256(key.encode()).hexdigest()
+        self.name = f'{self.digest}.pdf'
+        self.etag = f'"{self.digest}"'
+
+    def exists(self):
+        return certificate_storage().exists(self.name)
+
+    def modified_at(self):
+        return certificate_storage().get_modified_time(self.name)
+
+    def open(self):
+        return certificate_storage().open(self.name, 'rb')
+
+    def ensure(self):
+        """ Renders and stores the PDF unless it already is. Returns True if it was rendered. """
+        if self.exists():
+            return False
+        storage = certificate_storage()
+        saved = storage.save(self.name, ContentFile(render_certificate_pdf(self.context)))
+        if saved != self.name:
+            # Rendered concurrently by another request, the storage kept theirs and renamed ours.
+            storage.delete(saved)
+        return True
+
+
+class CertificateRenderer:
+    """ A warm WeasyPrint: one FontConfiguration and every stylesheet and font the template pulls in
+        (the Google Fonts @import) fetched once per process instead of once per render. """
+
+    def __init__(self):
+        self.font_config = FontConfiguration()
+        self._fetched = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, url, **kwargs):
+        resource = self._fetched.get(url)
+        if resource is None:
+            resource = default_url_fetcher(url, **kwargs)
+            if 'file_obj' in resource:
+                resource = dict(resource, string= resource.pop('file_obj').read())
+            with self._lock:
+                self._fetched[url] = resource
+        return dict(resource)
+
+    def render(self, context):
+        html = HTML(string= render_to_string(CERTIFICATE_TEMPLATE, context), url_fetcher= self.fetch)
+        return html.write_pdf(font_config= self.font_config)
+
+    def warm_up(self):
+        self.render({'student_name': 'EduNova', 'course_title': 'EduNova', 'completion_date': ''})
+
+
+_renderer = None
+
+
+def get_renderer():
+    global _renderer
+    if _renderer is None:
+        _renderer = CertificateRenderer()
+    return _renderer
+
+
+def render_certificate_pdf(context):
+    return get_renderer().render(context)
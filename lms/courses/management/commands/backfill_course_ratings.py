@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from courses.ratings import backfill_course_ratings
+
+
+class Command(BaseCommand):
+    help = "Recomputes the stored rating sum, count and per star histogram of every course from its reviews."
+
+    def handle(self, *args, **options):
+        count = backfill_course_ratings()
+        self.stdout.write(self.style.SUCCESS(f"Rating aggregates rebuilt for {count} courses."))
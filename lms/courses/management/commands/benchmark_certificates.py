@@ -0,0 +1,66 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+
+from courses.certificates import CertificateRenderer, get_renderer
+
+
+def sample_context(i):
+    return {'student_name': f'Student {i}', 'course_title': f'Benchmark Course {i % 10}',
+            'completion_date': 'January 01, 2026'}
+
+
+def warm_worker():
+    # Same as a process of the certificates celery queue (courses.tasks.warm_certificate_renderer).
+    django.setup()
+    get_renderer().warm_up()
+
+
+def render_one(i):
+    return len(get_renderer().render(sample_context(i)))
+
+
+class Command(BaseCommand):
+    help = "Measures certificate renders per second per core, cold (new WeasyPrint state per render) and warm."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--renders', type= int, default= 20, help= "Certificates rendered per run and process.")
+        parser.add_argument('--processes', type= int, default= os.cpu_count(),
+                            help= "Processes of the pool run, like worker -Q certificates -c N.")
+
+    def handle(self, *args, **options):
+        renders = options['renders']
+        processes = options['processes']
+
+        # What generate_certificate did before: fonts and the Google Fonts stylesheet loaded on every request.
+        elapsed = self.time(lambda i: CertificateRenderer().render(sample_context(i)), renders)
+        self.report('cold', renders, elapsed, 1)
+
+        renderer = CertificateRenderer()
+        renderer.warm_up()
+        elapsed = self.time(lambda i: renderer.render(sample_context(i)), renders)
+        self.report('warm', renders, elapsed, 1)
+
+        with ProcessPoolExecutor(max_workers= processes, initializer= warm_worker) as pool:
+            # Start (and warm) every process before timing.
+            list(pool.map(render_one, range(processes)))
+            start = time.perf_counter()
+            list(pool.map(render_one, range(renders * processes)))
+            elapsed = time.perf_counter() - start
+        self.report(f'pool x{processes}', renders * processes, elapsed, processes)
+
+    def time(self, run, renders):
+        start = time.perf_counter()
+        for i in range(renders):
+            run(i)
+        return time.perf_counter() - start
+
+    def report(self, label, renders, elapsed, cores):
+        per_second = renders / elapsed
+        self.stdout.write(
+            f"{label:>10} : {renders} renders in {elapsed:.2f} s, {per_second:.1f}/s, "
+            f"{per_second / cores:.1f}/s per core, {elapsed * 1000 / renders:.1f} ms each"
+        )
@@ -0,0 +1,75 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from courses.models import Course
+from courses.search import search_courses, update_course_search_vector
+
+
+WORDS = ('python', 'django', 'data', 'science', 'design', 'web', 'machine', 'learning', 'music', 'history',
+         'finance', 'marketing', 'cloud', 'security', 'writing', 'photography', 'cooking', 'language')
+
+
+class Command(BaseCommand):
+    help = "Compares the ranked full text course search with the old icontains search."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--query', default= 'machine learning', help= "Search text to benchmark.")
+        parser.add_argument('--repeat', type= int, default= 20, help= "Runs per search path.")
+        parser.add_argument('--courses', type= int, default= 0,
+                            help= "Insert this many synthetic courses first (rolled back afterwards).")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['courses']:
+                self.seed_courses(options['courses'])
+
+            query = options['query']
+            base = Course.objects.filter(is_published= True)
+            total = base.count()
+
+            icontains = lambda: list(base.filter(
+                Q(title__icontains= query) | Q(description__icontains= query)
+            ).order_by('-created_at')[:10])
+            full_text = lambda: list(search_courses(base, query)[:10])
+
+            self.stdout.write(f"{total} published courses, query '{query}', {options['repeat']} runs each.")
+            for label, run in (('icontains', icontains), ('full text', full_text)):
+                timings = self.time(run, options['repeat'])
+                self.stdout.write(
+                    f"{label:>10} : median {statistics.median(timings):.2f} ms, "
+                    f"max {max(timings):.2f} ms"
+                )
+
+            # Never keep the synthetic rows.
+            transaction.set_rollback(True)
+
+    def time(self, run, repeat):
+        run()   # warm up
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def seed_courses(self, count):
+        rng = random.Random(1)
+        batch = []
+        for i in range(count):
+            title = ' '.join(rng.sample(WORDS, 3)).title()
+            description = ' '.join(rng.choice(WORDS) for _ in range(60))
+            # A rare token per course gives the planner a selective query too (eg. --query lesson1234).
+            description += f' lesson{i}'
+            batch.append(Course(title= title, slug= f'benchmark-{i}', description= description, is_published= True))
+
+        Course.objects.bulk_create(batch, batch_size= 2000)
+        update_course_search_vector(Course.objects.filter(slug__startswith= 'benchmark-'))
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Course._meta.db_table}')
+        self.stdout.write(f"Inserted {count} synthetic courses.")
@@ -0,0 +1,106 @@
+import argparse
+import os
+import shutil
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time as dt_time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from courses.certificates import Certificate, certificate_storage, completed_enrollments, get_renderer
+from enrollment.models import Enroll
+
+
+def init_worker():
+    django.setup()
+    # Never share the parent's database connection with the forked processes.
+    connections.close_all()
+    get_renderer().warm_up()
+
+
+def render_enrollment(enrollment_id):
+    """ Runs in a pool process. Returns (enrollment id, stored name, whether it had to be rendered). """
+    enrollment = Enroll.objects.select_related('student', 'course').get(pk= enrollment_id)
+    certificate = Certificate(enrollment)
+    return enrollment_id, certificate.name, certificate.ensure()
+
+
+class Command(BaseCommand):
+    help = "Renders the certificates of every completed enrollment of a cohort into one ZIP file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help= "ZIP file to write. An existing one is resumed.")
+        parser.add_argument('--course', action= 'append', default= [],
+                            help= "Course slug (repeatable), all courses by default.")
+        parser.add_argument('--completed-from', type= self.parse_date, help= "YYYY-MM-DD, inclusive.")
+        parser.add_argument('--completed-to', type= self.parse_date, help= "YYYY-MM-DD, inclusive.")
+        parser.add_argument('--processes', type= int, default= os.cpu_count(), help= "Rendering processes.")
+
+    def parse_date(self, value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"'{value}' is not a YYYY-MM-DD date.")
+
+    def handle(self, *args, **options):
+        enrollments = completed_enrollments()
+        if options['course']:
+            enrollments = enrollments.filter(course__slug__in= options['course'])
+        if options['completed_from']:
+            enrollments = enrollments.filter(
+                completed_on__gte= timezone.make_aware(datetime.combine(options['completed_from'], dt_time.min)))
+        if options['completed_to']:
+            enrollments = enrollments.filter(
+                completed_on__lte= timezone.make_aware(datetime.combine(options['completed_to'], dt_time.max)))
+
+        entries = {
+            enrollment_id: f'{course_slug}/{username}-{enrollment_id}.pdf'
+            for enrollment_id, course_slug, username in enrollments.order_by('course_id', 'id').values_list(
+                'id', 'course__slug', 'student__username')
+        }
+
+        output = options['output']
+        mode, written = self.resume(output)
+        pending = [enrollment_id for enrollment_id, arcname in entries.items() if arcname not in written]
+        self.stdout.write(f"{len(entries)} certificates, {len(entries) - len(pending)} already in {output}, "
+                          f"{len(pending)} to write.")
+        if not pending:
+            return
+
+        # The forked processes would otherwise inherit the open connection.
+        connections.close_all()
+
+        storage = certificate_storage()
+        rendered = done = 0
+        start = time.perf_counter()
+        # Each PDF is copied into the archive from storage as its render finishes, so only one is in memory at
+        # a time. The archive is closed properly on Ctrl-C too, a rerun then appends the missing ones; renders
+        # already stored by an interrupted run are not repeated either (courses/certificates.py).
+        with zipfile.ZipFile(output, mode) as archive, ProcessPoolExecutor(
+                max_workers= options['processes'], initializer= init_worker) as pool:
+            for enrollment_id, name, was_rendered in pool.map(render_enrollment, pending, chunksize= 4):
+                with storage.open(name, 'rb') as pdf, archive.open(entries[enrollment_id], 'w') as entry:
+                    shutil.copyfileobj(pdf, entry)
+                done += 1
+                rendered += was_rendered
+                if done % 100 == 0 or done == len(pending):
+                    elapsed = time.perf_counter() - start
+                    self.stdout.write(f"{done}/{len(pending)} written ({rendered} rendered), "
+                                      f"{done / elapsed:.1f}/s")
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {done} certificates to {output}."))
+
+    def resume(self, output):
+        """ The ZipFile mode and the entries already in the archive. """
+        if not os.path.exists(output):
+            return 'w', set()
+        if not zipfile.is_zipfile(output):
+            # Killed before the archive was closed, start it over, the stored renders make that cheap.
+            self.stdout.write(self.style.WARNING(f"{output} is not a complete ZIP file, rewriting it."))
+            return 'w', set()
+        with zipfile.ZipFile(output) as archive:
+            return 'a', set(archive.namelist())
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:30
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def populate_search_vector(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Course.objects.update(search_vector=(
+        SearchVector('title', weight='A', config='english') +
+        SearchVector('description', weight='B', config='english')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_alter_lesson_content_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='course_search_vector_idx'),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_course_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-created_at', '-id'], name='course_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:34
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_ratings(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Review = apps.get_model('courses', 'Review')
+
+    stars = {f'rating_{star}_count': Count('id', filter=Q(rating=star)) for star in range(1, 6)}
+    rows = Review.objects.values('course').annotate(total=Sum('rating'), count=Count('id'), **stars)
+    for row in rows:
+        Course.objects.filter(pk=row['course']).update(
+            rating_sum=row['total'], rating_count=row['count'], **{field: row[field] for field in stars},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_course_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
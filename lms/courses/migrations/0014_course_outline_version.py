@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_course_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='outline_version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:48
+
+from django.db import migrations, models
+
+
+def assign_bit_indexes(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Lesson = apps.get_model('courses', 'Lesson')
+
+    for course in Course.objects.only('id'):
+        lessons = list(Lesson.objects.filter(module__course=course).order_by('id').only('id'))
+        for bit_index, lesson in enumerate(lessons):
+            lesson.bit_index = bit_index
+        Lesson.objects.bulk_update(lessons, ['bit_index'], batch_size=1000)
+        Course.objects.filter(pk=course.pk).update(lesson_bit_slots=len(lessons))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_course_outline_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='lesson_bit_slots',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='bit_index',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(assign_bit_indexes, migrations.RunPython.noop),
+    ]
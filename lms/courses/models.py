@@ -2,8 +2,9 @@ from django.db import models
 from django.conf import settings
 from django.utils.text import slugify
 from django.urls import reverse
-from django.db.models import Avg
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 import uuid
 import os
 
@@ -57,12 +58,48 @@ class Course(models.Model):
     updated_at = models.DateField(auto_now= True)
     is_published = models.BooleanField(default= False)
 
+    # Full text search document, kept up to date by courses.signals (see courses/search.py).
+    search_vector = SearchVectorField(null= True, editable= False)
+
+    # Review aggregates, kept up to date by courses.signals (see courses/ratings.py).
+    rating_sum = models.PositiveIntegerField(default= 0, editable= False)
+    rating_count = models.PositiveIntegerField(default= 0, editable= False)
+    rating_1_count = models.PositiveIntegerField(default= 0, editable= False)
+    rating_2_count = models.PositiveIntegerField(default= 0, editable= False)
+    rating_3_count = models.PositiveIntegerField(default= 0, editable= False)
+    rating_4_count = models.PositiveIntegerField(default= 0, editable= False)
+    rating_5_count = models.PositiveIntegerField(default= 0, editable= False)
+
+    # Bumped by courses.signals whenever a module or lesson changes, keys the cached outline (courses/outline.py).
+    outline_version = models.PositiveIntegerField(default= 1, editable= False)
+
+    # Completion bit slots handed out to this course's lessons so far (enrollment/bitset.py).
+    lesson_bit_slots = models.PositiveIntegerField(default= 0, editable= False)
+
+    # Maintained with atomic UPDATEs only, a full save of a stale instance must not write them back.
+    DENORMALIZED_FIELDS = (
+        'search_vector', 'rating_sum', 'rating_count',
+        'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count',
+        'outline_version', 'lesson_bit_slots',
+    )
+
     class Meta:
         ordering= ['-created_at']
+        indexes = [
+            GinIndex(fields= ['search_vector'], name= 'course_search_vector_idx'),
+            # Keyset pagination of the catalog (courses/pagination.py).
+            models.Index(fields= ['-created_at', '-id'], name= 'course_created_id_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug= slugify(self.title)
+
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.DENORMALIZED_FIELDS
+            ]
         return super().save(*args, **kwargs)
 
     def __str__(self):
@@ -73,10 +110,14 @@ class Course(models.Model):
     
     @property
     def average_rating(self):
-        avg = self.reviews.all().aggregate(Avg('rating'))['rating__avg']
-        if avg is None:
+        if not self.rating_count:
             return 0
-        return round(avg, 1)
+        return round(self.rating_sum / self.rating_count, 1)
+    
+    @property
+    def rating_histogram(self):
+        """ Number of reviews per star, from 5 down to 1. """
+        return {star: getattr(self, f'rating_{star}_count') for star in range(5, 0, -1)}
     
 
 class Module(models.Model):
@@ -142,6 +183,10 @@ class Lesson(models.Model):
     updated_at = models.DateField(auto_now= True)
     is_published = models.BooleanField(default= False)
 
+    # This lesson's bit in Enroll.completion_bits. Stable across reorders and never reused within
+    # the course, assigned by enrollment.signals (see enrollment/bitset.py).
+    bit_index = models.PositiveIntegerField(null= True, blank= True, editable= False)
+
     class Meta:
         ordering = ['order']
         unique_together = ('module', 'order')
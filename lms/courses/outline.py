@@ -0,0 +1,112 @@
+from django.core.cache import cache
+from django.db.models import F
+
+from .models import Course, Module, Lesson
+
+
+# Bump OUTLINE_FORMAT when the cached dicts change shape, old entries are then simply never read again.
+OUTLINE_FORMAT = 2
+OUTLINE_CACHE_KEY = 'courses:outline:{course_id}:v{version}:f%d' % OUTLINE_FORMAT
+SEQUENCE_CACHE_KEY = 'courses:lesson_sequence:{course_id}:v{version}:f%d' % OUTLINE_FORMAT
+OUTLINE_TIMEOUT = 60 * 60 * 24
+
+
+def build_course_outline(course_id):
+    """ Modules and their lessons as plain dicts, in display order. Two queries. """
+    modules = {
+        module['id']: dict(module, lessons= [])
+        for module in Module.objects.filter(course_id= course_id).order_by('order', 'id').values(
+            'id', 'title', 'slug', 'order', 'description')
+    }
+
+    content_types = dict(Lesson.CONTENT_CHOICES)
+    lessons = Lesson.objects.filter(module__course_id= course_id).order_by('order', 'id').values(
+        'id', 'module_id', 'title', 'slug', 'order', 'content_type', 'is_published', 'bit_index')
+
+    for lesson in lessons:
+        lesson['content_type_display'] = content_types.get(lesson['content_type'], lesson['content_type'])
+        modules[lesson.pop('module_id')]['lessons'].append(lesson)
+
+    return list(modules.values())
+
+
+def get_course_outline(course):
+    """ The cached outline for the course's current outline_version.
+        Shared by the course detail page and the api CourseDetailSerializer. """
+    key = OUTLINE_CACHE_KEY.format(course_id= course.id, version= course.outline_version)
+    outline = cache.get(key)
+    if outline is None:
+        outline = build_course_outline(course.id)
+        cache.set(key, outline, timeout= OUTLINE_TIMEOUT)
+    return outline
+
+
+class LessonSequence:
+    """ Published lessons of a course in reading order (module order, then lesson order),
+        with a position index so previous/next lookups are O(1) and cross module boundaries. """
+
+    def __init__(self, lessons):
+        self.lessons = lessons
+        self.positions = {lesson['id']: index for index, lesson in enumerate(lessons)}
+
+    def __len__(self):
+        return len(self.lessons)
+
+    def position(self, lesson_id):
+        return self.positions.get(lesson_id)
+
+    def previous(self, lesson_id):
+        index = self.positions.get(lesson_id)
+        if index is None or index == 0:
+            return None
+        return self.lessons[index - 1]
+
+    def next(self, lesson_id):
+        index = self.positions.get(lesson_id)
+        if index is None or index + 1 >= len(self.lessons):
+            return None
+        return self.lessons[index + 1]
+
+    def first_incomplete(self, completed_ids):
+        """ The first lesson in reading order whose id is not in completed_ids. """
+        for lesson in self.lessons:
+            if lesson['id'] not in completed_ids:
+                return lesson
+        return None
+
+
+def build_lesson_sequence(outline):
+    lessons = []
+    for module in outline:
+        for lesson in module['lessons']:
+            if lesson['is_published']:
+                lessons.append({
+                    'id': lesson['id'],
+                    'title': lesson['title'],
+                    'slug': lesson['slug'],
+                    'module_id': module['id'],
+                    'module_slug': module['slug'],
+                    'bit_index': lesson['bit_index'],
+                })
+    return LessonSequence(lessons)
+
+
+def get_lesson_sequence(course):
+    """ The cached lesson sequence for the course's current outline_version. """
+    key = SEQUENCE_CACHE_KEY.format(course_id= course.id, version= course.outline_version)
+    sequence = cache.get(key)
+    if sequence is None:
+        sequence = build_lesson_sequence(get_course_outline(course))
+        cache.set(key, sequence, timeout= OUTLINE_TIMEOUT)
+    return sequence
+
+
+def bump_outline_version(course_id= None, module_id= None):
+    """ Moves the course to a new outline version, old cache entries simply expire. """
+    if course_id is not None:
+        courses = Course.objects.filter(pk= course_id)
+    elif module_id is not None:
+        courses = Course.objects.filter(modules__id= module_id)
+    else:
+        return
+    courses.update(outline_version= F('outline_version') + 1)
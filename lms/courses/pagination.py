@@ -0,0 +1,164 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+DEFAULT_ORDERING = ('-created_at', '-id')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value):
+    # isoformat keeps microseconds, which the keyset comparison needs to be exact.
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values, reverse= False):
+    payload = json.dumps({'v': [_encode_value(v) for v in values], 'r': int(reverse)}, separators= (',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return list(payload['v']), bool(payload.get('r'))
+    except (binascii.Error, ValueError, TypeError, KeyError, AttributeError):
+        raise InvalidCursor("Invalid cursor.")
+
+
+def get_keyset_ordering(queryset, default= DEFAULT_ORDERING):
+    """ Uses the queryset's explicit order_by (eg. search rank) or the default, always ending on the pk
+        so that every row has a unique position. """
+    ordering = [o for o in queryset.query.order_by if isinstance(o, str)] or list(default)
+
+    for name in ordering:
+        if '__' in name.lstrip('-'):
+            raise ValueError(f"Keyset pagination can't order on related field '{name}'.")
+
+    if ordering[-1].lstrip('-') not in ('id', 'pk'):
+        ordering.append('-id' if ordering[-1].startswith('-') else 'id')
+    return tuple(ordering)
+
+
+class KeysetPage:
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """ Cursor (keyset) pagination, a page is fetched with `WHERE (ordering) < (last row) LIMIT n`
+        so page N costs the same as page 1. Ordering fields must be non null.
+        Shared by the course catalog and the api (api.pagination.KeysetPagination). """
+
+    def __init__(self, queryset, per_page, default_ordering= DEFAULT_ORDERING):
+        self.per_page = per_page
+        self.ordering = get_keyset_ordering(queryset, default_ordering)
+        self.queryset = queryset.order_by(*self.ordering)
+
+    def get_page(self, cursor= None):
+        if not cursor:
+            return self._page(self.queryset, reverse= False, from_cursor= False)
+
+        values, reverse = decode_cursor(cursor)
+        if len(values) != len(self.ordering):
+            raise InvalidCursor("Invalid cursor.")
+
+        values = [self._to_python(name, value) for name, value in zip(self.ordering, values)]
+        queryset = self.queryset
+        if reverse:
+            queryset = queryset.order_by(*[self._flip(name) for name in self.ordering])
+
+        return self._page(queryset.filter(self._after(values, reverse)), reverse= reverse, from_cursor= True)
+
+    def get_page_or_first(self, cursor= None):
+        """ Html views fall back to the first page instead of raising on a bad cursor. """
+        try:
+            return self.get_page(cursor)
+        except InvalidCursor:
+            return self.get_page()
+
+    def _page(self, queryset, reverse, from_cursor):
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = from_cursor, has_more
+        else:
+            has_next, has_previous = has_more, from_cursor
+
+        next_cursor = encode_cursor(self._values(rows[-1])) if rows and has_next else None
+        previous_cursor = encode_cursor(self._values(rows[0]), reverse= True) if rows and has_previous else None
+        return KeysetPage(rows, has_next, has_previous, next_cursor, previous_cursor)
+
+    def _after(self, values, reverse):
+        """ Builds (a < x) OR (a = x AND b < y) OR ..., with comparisons flipped for ascending fields. """
+        condition = Q()
+        for i, name in enumerate(self.ordering):
+            lookup = 'lt' if name.startswith('-') != reverse else 'gt'
+            clause = Q(**{f"{self._field(name)}__{lookup}": values[i]})
+            for previous, value in zip(self.ordering[:i], values):
+                clause &= Q(**{self._field(previous): value})
+            condition |= clause
+
+        # Redundant bound on the leading column lets the planner use the index range.
+        first = self.ordering[0]
+        lookup = 'lte' if first.startswith('-') != reverse else 'gte'
+        return Q(**{f"{self._field(first)}__{lookup}": values[0]}) & condition
+
+    def _values(self, obj):
+        return [getattr(obj, self._field(name)) for name in self.ordering]
+
+    def _to_python(self, name, value):
+        try:
+            field = self.queryset.model._meta.get_field(self._field(name))
+        except FieldDoesNotExist:
+            # Annotations (search rank, roster aggregates) convert through their output field.
+            annotation = self.queryset.query.annotations.get(self._field(name))
+            if annotation is None:
+                return value
+            field = annotation.output_field
+        try:
+            return field.to_python(value)
+        except ValidationError:
+            raise InvalidCursor("Invalid cursor.")
+
+    @staticmethod
+    def _field(name):
+        name = name.lstrip('-')
+        return 'id' if name == 'pk' else name
+
+    @staticmethod
+    def _flip(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+
+def cursor_query_string(query_dict, cursor, param= 'cursor'):
+    """ Returns the current GET parameters with the cursor swapped, for next/previous links. """
+    params = query_dict.copy()
+    params[param] = cursor
+    params.pop('page', None)
+    return f'?{params.urlencode()}'
@@ -0,0 +1,48 @@
+from django.db.models import F, Sum, Count, Q
+
+from .models import Course, Review
+
+
+RATING_STARS = range(1, 6)
+
+
+def rating_count_field(rating):
+    return f'rating_{rating}_count'
+
+
+def apply_review_rating(course_id, rating, sign= 1):
+    """ Adds (sign= 1) or removes (sign= -1) one review's rating from its course, in one atomic UPDATE. """
+    if course_id is None or rating not in RATING_STARS:
+        return
+
+    star_field = rating_count_field(rating)
+    Course.objects.filter(pk= course_id).update(
+        rating_sum= F('rating_sum') + sign * rating,
+        rating_count= F('rating_count') + sign,
+        **{star_field: F(star_field) + sign},
+    )
+
+
+def backfill_course_ratings(courses= None):
+    """ Recomputes the stored rating aggregates from the reviews table, one grouped query for all courses. """
+    courses = Course.objects.all() if courses is None else courses
+
+    aggregates = Review.objects.filter(course__in= courses).values('course').annotate(
+        total= Sum('rating'),
+        count= Count('id'),
+        **{rating_count_field(star): Count('id', filter= Q(rating= star)) for star in RATING_STARS},
+    )
+    by_course = {row['course']: row for row in aggregates}
+
+    fields = ['rating_sum', 'rating_count'] + [rating_count_field(star) for star in RATING_STARS]
+    updated = []
+    for course in courses.only('id', *fields):
+        row = by_course.get(course.id, {})
+        course.rating_sum = row.get('total') or 0
+        course.rating_count = row.get('count', 0)
+        for star in RATING_STARS:
+            setattr(course, rating_count_field(star), row.get(rating_count_field(star), 0))
+        updated.append(course)
+
+    Course.objects.bulk_update(updated, fields, batch_size= 1000)
+    return len(updated)
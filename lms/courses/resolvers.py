@@ -0,0 +1,39 @@
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from .models import Lesson
+from quiz.models import Quiz, Question, QuizAttempt
+
+
+def resolve_lesson_path(course_slug, module_slug, lesson_slug):
+    """ Maps the lesson url slugs to (course, module, lesson) with one joined query, instead of
+        three get_object_or_404 calls. Only published lessons of published courses resolve. """
+    lesson = Lesson.objects.select_related('module__course').filter(
+        slug= lesson_slug, is_published= True,
+        module__slug= module_slug,
+        module__course__slug= course_slug, module__course__is_published= True,
+    ).order_by('module__order', 'order', 'pk').first()
+    if lesson is None:
+        raise Http404("No lesson matches the given query.")
+
+    return lesson.module.course, lesson.module, lesson
+
+
+# ------------- QUIZ PATHS ------------------------------------------------.
+
+def resolve_lesson(lesson_id):
+    """ Lesson by id with its module and course, in one query. """
+    return get_object_or_404(Lesson.objects.select_related('module__course'), id= lesson_id)
+
+
+def resolve_quiz(quiz_id, **filters):
+    """ Quiz by id with its lesson, module and course (quiz.lesson.module.course), in one query. """
+    return get_object_or_404(Quiz.objects.select_related('lesson__module__course'), id= quiz_id, **filters)
+
+
+def resolve_question(question_id):
+    return get_object_or_404(Question.objects.select_related('quiz__lesson__module__course'), id= question_id)
+
+
+def resolve_attempt(attempt_id):
+    return get_object_or_404(QuizAttempt.objects.select_related('quiz__lesson__module__course'), id= attempt_id)
@@ -0,0 +1,59 @@
+from django.db.models import Case, Count, F, FloatField, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest, NullIf
+
+from enrollment.models import Enroll
+from users.models import UserLessonCompletion
+
+
+ROSTER_PAGE_SIZE = 25
+# Latest quiz attempts listed under the roster.
+RECENT_ATTEMPTS = 20
+
+# ?sort= values of the roster and their keyset ordering (the paginator appends the id tiebreak).
+ROSTER_SORTS = {
+    'student': ('username',),
+    '-student': ('-username',),
+    'progress': ('progress',),
+    '-progress': ('-progress',),
+    'attempts': ('attempt_count',),
+    '-attempts': ('-attempt_count',),
+    'best_score': ('best_score',),
+    '-best_score': ('-best_score',),
+    'last_activity': ('last_activity',),
+    '-last_activity': ('-last_activity',),
+}
+DEFAULT_ROSTER_SORT = '-last_activity'
+
+
+def course_roster(course, sort= DEFAULT_ROSTER_SORT):
+    """ One row per enrollment with progress, quiz attempt count, best score (%) and last activity,
+        computed in a single grouped query. Every sort column is non null so it can be keyset paginated. """
+    attempts_of_course = Q(student__qui_attempts__quiz__lesson__module__course= course)
+    completed_attempts = attempts_of_course & Q(student__qui_attempts__is_completed= True)
+
+    attempt_percent = (
+        Cast(F('student__qui_attempts__score'), FloatField()) * 100.0
+        / NullIf(F('student__qui_attempts__total_marks'), 0)
+    )
+
+    last_lesson_completion = UserLessonCompletion.objects.filter(
+        student= OuterRef('student_id'), lesson__module__course= course, is_completed= True,
+    ).order_by('-completed_at').values('completed_at')[:1]
+
+    roster = Enroll.objects.filter(course= course).annotate(
+        username= F('student__username'),
+        email= F('student__email'),
+        progress= Case(
+            When(total_lessons= 0, then= Value(0.0)),
+            default= Cast(F('completed_lessons'), FloatField()) * 100.0 / F('total_lessons'),
+            output_field= FloatField(),
+        ),
+        attempt_count= Count('student__qui_attempts', filter= attempts_of_course),
+        best_score= Coalesce(Max(attempt_percent, filter= completed_attempts), 0.0),
+        last_activity= Greatest(
+            F('enrolled_at'),
+            Coalesce(Max('student__qui_attempts__started_at', filter= attempts_of_course), F('enrolled_at')),
+            Coalesce(Subquery(last_lesson_completion), F('enrolled_at')),
+        ),
+    )
+    return roster.order_by(*ROSTER_SORTS.get(sort, ROSTER_SORTS[DEFAULT_ROSTER_SORT]))
@@ -0,0 +1,30 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+
+SEARCH_CONFIG = 'english'
+
+
+def course_search_vector():
+    """ The weighted document stored in Course.search_vector, title ranks above description. """
+    return (
+        SearchVector('title', weight= 'A', config= SEARCH_CONFIG) +
+        SearchVector('description', weight= 'B', config= SEARCH_CONFIG)
+    )
+
+
+def update_course_search_vector(queryset):
+    """ Rebuilds the stored search document for every course in the queryset with one UPDATE. """
+    return queryset.update(search_vector= course_search_vector())
+
+
+def search_courses(queryset, search_text):
+    """ Filters the queryset with the GIN indexed search vector and orders it by relevance.
+        Shared by the html catalog and the api, so both return the same results. """
+    search_query = SearchQuery(search_text, search_type= 'websearch', config= SEARCH_CONFIG)
+
+    # ts_rank returns a float4, cast it so the keyset cursor round trips the exact value.
+    return queryset.filter(search_vector= search_query).annotate(
+        rank= Cast(SearchRank(F('search_vector'), search_query), FloatField())
+    ).order_by('-rank', '-created_at', '-id')
@@ -0,0 +1,77 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Course, Module, Lesson, Review
+from .search import update_course_search_vector
+from .ratings import apply_review_rating
+from .carousel import invalidate_category_carousel
+from .outline import bump_outline_version
+
+
+@receiver(pre_save, sender= Course)
+def remember_course_category(sender, instance, **kwargs):
+    instance._previous_category_id = None
+    if instance.pk:
+        instance._previous_category_id = Course.objects.filter(
+            pk= instance.pk).values_list('category_id', flat= True).first()
+
+
+@receiver(post_save, sender= Course)
+def refresh_course_search_vector(sender, instance, update_fields= None, **kwargs):
+    # Only rebuild the document when the indexed text could have changed.
+    if update_fields is None or {'title', 'description'} & set(update_fields):
+        update_course_search_vector(Course.objects.filter(pk= instance.pk))
+
+
+# ------------- HOME PAGE CAROUSEL ------------------------------------------------.
+
+@receiver(post_save, sender= Course)
+def invalidate_carousel_on_save(sender, instance, **kwargs):
+    # A course moved to another category leaves a stale card in the old one too.
+    invalidate_category_carousel(instance.category_id, getattr(instance, '_previous_category_id', None))
+
+
+@receiver(post_delete, sender= Course)
+def invalidate_carousel_on_delete(sender, instance, **kwargs):
+    invalidate_category_carousel(instance.category_id)
+
+
+# ------------- COURSE RATING AGGREGATES ------------------------------------------------.
+
+@receiver(pre_save, sender= Review)
+def remember_review_rating(sender, instance, **kwargs):
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = Review.objects.filter(pk= instance.pk).values('course_id', 'rating').first()
+
+
+@receiver(post_save, sender= Review)
+def update_course_rating_on_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_rating', None)
+    rating = int(instance.rating)
+
+    if previous and (previous['course_id'], previous['rating']) == (instance.course_id, rating):
+        return
+
+    if previous:
+        apply_review_rating(previous['course_id'], previous['rating'], sign= -1)
+    apply_review_rating(instance.course_id, rating)
+
+
+@receiver(post_delete, sender= Review)
+def update_course_rating_on_delete(sender, instance, **kwargs):
+    apply_review_rating(instance.course_id, int(instance.rating), sign= -1)
+
+
+# ------------- COURSE OUTLINE VERSION ------------------------------------------------.
+
+@receiver(post_save, sender= Module)
+@receiver(post_delete, sender= Module)
+def bump_outline_on_module_change(sender, instance, **kwargs):
+    bump_outline_version(course_id= instance.course_id)
+
+
+@receiver(post_save, sender= Lesson)
+@receiver(post_delete, sender= Lesson)
+def bump_outline_on_lesson_change(sender, instance, **kwargs):
+    bump_outline_version(module_id= instance.module_id)
@@ -0,0 +1,31 @@
+from celery import current_app, shared_task
+from celery.signals import worker_process_init
+
+from enrollment.models import Enroll
+from .certificates import CERTIFICATE_QUEUE, Certificate, get_renderer
+from .tracking import flush_lesson_views
+
+
+@shared_task
+def task_flush_lesson_views():
+    """Periodic task that writes the buffered lesson views to the database in bulk."""
+    flushed = flush_lesson_views()
+    return f"Lesson views flushed : {flushed}"
+
+
+@shared_task
+def task_render_certificate(enrollment_id):
+    """Renders and stores the certificate of a completed enrollment, routed to the certificates queue."""
+    enrollment = Enroll.objects.select_related('student', 'course').filter(pk= enrollment_id).first()
+    if enrollment is None or not enrollment.has_completed_course:
+        return f"Certificate skipped : enrollment {enrollment_id}"
+    certificate = Certificate(enrollment)
+    rendered = certificate.ensure()
+    return f"Certificate {'rendered' if rendered else 'already stored'} : {certificate.name}"
+
+
+@worker_process_init.connect
+def warm_certificate_renderer(**kwargs):
+    # Only the processes of a worker consuming the certificates queue (-Q certificates) load fonts up front.
+    if CERTIFICATE_QUEUE in current_app.amqp.queues.consume_from:
+        get_renderer().warm_up()
@@ -0,0 +1,125 @@
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .models import Lesson
+from users.models import UserLessonCompletion
+
+
+# Write-behind buffer for lesson views. lesson_detail only records (student, lesson) -> time in the buffer,
+# courses.tasks.task_flush_lesson_views upserts the buffered views into UserLessonCompletion.last_viewed_at.
+
+LESSON_VIEW_FLUSH_BATCH = 5000
+
+
+class LocalViewBuffer:
+    """ In-process buffer, for development and tests (LESSON_VIEW_BUFFER_URL = None). Views recorded by
+        another process are only flushed by that process. """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, student_id, lesson_id, viewed_at):
+        with self._lock:
+            self._views[(student_id, lesson_id)] = viewed_at.timestamp()
+
+    def drain(self, batch_size):
+        with self._lock:
+            views, self._views = self._views, {}
+        views = list(views.items())
+        for start in range(0, len(views), batch_size):
+            yield views[start:start + batch_size]
+
+    def __len__(self):
+        return len(self._views)
+
+
+class RedisViewBuffer:
+    """ One Redis hash of "student_id:lesson_id" -> timestamp, repeated views of a lesson collapse into one field.
+        A flush renames the hash first, so views recorded during the flush land in a fresh one, and a
+        flush that dies half way leaves its renamed hash to be picked up by the next one. """
+
+    KEY = 'courses:lesson_views'
+    DRAINING_PREFIX = 'courses:lesson_views:draining:'
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+
+    def record(self, student_id, lesson_id, viewed_at):
+        self.client.hset(self.KEY, f'{student_id}:{lesson_id}', viewed_at.timestamp())
+
+    def drain(self, batch_size):
+        """ Yields lists of ((student_id, lesson_id), timestamp). A drained hash is only deleted once its
+            last batch was handed out and the caller came back for more, ie. after it was written. """
+        # Time ordered names, so hashes left over by a failed flush are applied before newer views.
+        draining = f'{self.DRAINING_PREFIX}{time.time_ns():020d}'
+        try:
+            self.client.rename(self.KEY, draining)
+        except redis.exceptions.ResponseError:
+            pass    # no such key, nothing was viewed since the last flush.
+
+        for key in sorted(self.client.scan_iter(match= f'{self.DRAINING_PREFIX}*')):
+            batch = []
+            for field, timestamp in self.client.hscan_iter(key, count= batch_size):
+                student_id, lesson_id = field.decode().split(':')
+                batch.append(((int(student_id), int(lesson_id)), float(timestamp)))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+            self.client.delete(key)
+
+    def __len__(self):
+        return self.client.hlen(self.KEY)
+
+
+_buffer = None
+
+
+def get_view_buffer():
+    global _buffer
+    if _buffer is None:
+        url = getattr(settings, 'LESSON_VIEW_BUFFER_URL', None)
+        _buffer = RedisViewBuffer(url) if url else LocalViewBuffer()
+    return _buffer
+
+
+def record_lesson_view(student_id, lesson_id):
+    """ Called on every lesson page view, no database access. """
+    get_view_buffer().record(student_id, lesson_id, timezone.now())
+
+
+def flush_lesson_views(batch_size= LESSON_VIEW_FLUSH_BATCH):
+    """ Upserts the buffered views, one INSERT ... ON CONFLICT (student, lesson) DO UPDATE per batch.
+        Returns how many (student, lesson) pairs were written. """
+    flushed = 0
+    for batch in get_view_buffer().drain(batch_size):
+        flushed += _upsert_views([
+            UserLessonCompletion(
+                student_id= student_id, lesson_id= lesson_id, is_completed= False,
+                last_viewed_at= datetime.fromtimestamp(timestamp, tz= dt_timezone.utc),
+            )
+            for (student_id, lesson_id), timestamp in batch
+        ])
+    return flushed
+
+
+def _upsert_views(views):
+    # Drop views of lessons or users deleted since, one bad row would fail the whole statement.
+    lesson_ids = set(Lesson.objects.filter(id__in= {v.lesson_id for v in views}).values_list('id', flat= True))
+    student_ids = set(get_user_model().objects.filter(
+        id__in= {v.student_id for v in views}).values_list('id', flat= True))
+    views = [v for v in views if v.lesson_id in lesson_ids and v.student_id in student_ids]
+
+    # Existing rows only get last_viewed_at, is_completed and completed_at are left alone.
+    UserLessonCompletion.objects.bulk_create(
+        views, update_conflicts= True, unique_fields= ['student', 'lesson'], update_fields= ['last_viewed_at'],
+    )
+    return len(views)
@@ -62,6 +62,11 @@ urlpatterns = [
          name= 'lesson_delete'
          ),
 
+    # Before the lesson pattern below, which would otherwise match it.
+    path('<slug:course_slug>/certificate/status/', 
+        views.certificate_status,
+        name= 'certificate_status'),
+
     path(
         '<slug:course_slug>/<slug:module_slug>/<slug:lesson_slug>/complete/', 
          views.mark_lesson_completion, 
@@ -2,12 +2,24 @@ from django.shortcuts import render, get_object_or_404, redirect
 from .models import Category, Course, Module, Lesson, Review
 from .forms import CourseForm, ModuleForm, LessonCreateForm, LessonUpdateForm, CommentForm, CategoryForm, ReviewForm
 from enrollment.models import Enroll
+from enrollment.services import is_enrolled_in
 from quiz.models import QuizAttempt, Quiz
-from users.models import UserLessonCompletion, MemberUser
-from users.task import task_notify_new_lesson
+from users.models import UserLessonCompletion
+from users.tasks import task_notify_new_lesson
+from core.stats import get_site_stats
+from .search import search_courses
+from .pagination import KeysetPaginator, cursor_query_string
+from .carousel import get_category_carousel
+from .outline import get_course_outline, get_lesson_sequence
+from .resolvers import resolve_lesson_path
+from .tracking import record_lesson_view
+from .certificates import Certificate, CERTIFICATE_RENDER_LOCK_KEY, CERTIFICATE_RENDER_LOCK_TIMEOUT
+from .tasks import task_render_certificate
+from .roster import course_roster, ROSTER_SORTS, ROSTER_PAGE_SIZE, DEFAULT_ROSTER_SORT, RECENT_ATTEMPTS
 
 from django.contrib.auth.decorators import login_required
-from django.http import Http404, FileResponse, HttpResponse
+from django.http import Http404, FileResponse, HttpResponse, JsonResponse
+from django.core.cache import cache
 from django.db import IntegrityError, models
 from django.db.models import Max, Q, Prefetch, F
 from django.utils import timezone
@@ -15,24 +27,22 @@ from django.contrib import messages
 from django.utils.text import slugify
 from django.views.generic import CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.urls import reverse_lazy
-from django.core.paginator import Paginator
-from django.template.loader import render_to_string
-from weasyprint import HTML
+from django.urls import reverse, reverse_lazy
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 import os
 # Create your views here.
 
 def home(request):
-    categories = Category.objects.prefetch_related(
-        Prefetch('courses', queryset= Course.objects.filter(is_published= True))
-    )
+    # Top 4 newest courses per category, from one window query cached per category.
+    category_carousel = get_category_carousel(Category.objects.all())
 
-    course_count = Course.objects.filter(is_published= True).count()
-    student_count = MemberUser.objects.filter(is_student= True).count()
-    instructor_count = MemberUser.objects.filter(is_instructor= True).count()
+    # Counters are kept up to date by core.signals, no COUNT(*) on this page.
+    stats = get_site_stats()
 
-    context = {'categories': categories, 'course_count': course_count,
-               'student_count': student_count, 'instructor_count': instructor_count, 'page_title': 'Welcome to EduNova'}
+    context = {'category_carousel': category_carousel, 'course_count': stats['course_count'],
+               'student_count': stats['student_count'], 'instructor_count': stats['instructor_count'],
+               'page_title': 'Welcome to EduNova'}
     
     return render(request, 'main.html', context)
 
@@ -42,14 +52,13 @@ def course_list(request):
     category_slug = request.GET.get('category')
     categories = Category.objects.all()
 
-    query = Course.objects.filter(is_published= True).order_by('-created_at')
+    query = Course.objects.filter(is_published= True).select_related('instructor').defer('search_vector')
+    query = query.order_by('-created_at')
     search_query = request.GET.get('q')
 
     if search_query:
-        query = query.filter(
-            Q(title__icontains= search_query) | 
-            Q(description__icontains= search_query)
-        )
+        # Ranked full text search on the GIN indexed search vector.
+        query = search_courses(query, search_query)
 
     if category_slug:
         category = get_object_or_404(Category, slug= category_slug)
@@ -57,21 +66,24 @@ def course_list(request):
     else:
         category = None
 
-    # Pagination
-    course = Course.objects.all()
-    paginator = Paginator(course, 10)
+    # Keyset pagination over the filtered courses, page N costs the same as page 1.
+    paginator = KeysetPaginator(query, 10)
+    page_obj = paginator.get_page_or_first(request.GET.get('cursor'))
 
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    next_page_url = cursor_query_string(request.GET, page_obj.next_cursor) if page_obj.has_next else None
+    previous_page_url = cursor_query_string(request.GET, page_obj.previous_cursor) if page_obj.has_previous else None
     
-    context= {'courses': query, "categories": categories, 'selected_category': category,
-              'page_obj': page_obj, "page_title": 'All Courses'}
+    context= {'courses': page_obj.object_list, "categories": categories, 'selected_category': category,
+              'page_obj': page_obj, 'next_page_url': next_page_url, 'previous_page_url': previous_page_url,
+              "page_title": 'All Courses'}
     return render(request, 'courses/course_list.html', context)
 
 @login_required(login_url= 'users:login')
 def course_detail(request, course_slug):
-    course = get_object_or_404(Course, slug= course_slug, is_published= True)
-    modules = course.modules.prefetch_related('lesson').all()
+    course = get_object_or_404(Course.objects.select_related('instructor', 'category').defer('search_vector'),
+                               slug= course_slug, is_published= True)
+    # Modules and lessons come from the cached outline, rebuilt only when the outline version changes.
+    modules = get_course_outline(course)
     is_enrolled = False
     review_form = None
     user_review = None
@@ -79,10 +91,10 @@ def course_detail(request, course_slug):
     reviews = course.reviews.all().select_related('student')
 
     if request.user.is_authenticated and request.user.is_student:
-        is_enrolled = Enroll.objects.filter(student= request.user, course= course).exists()
+        is_enrolled = is_enrolled_in(request.user, course)
 
-        # Check if the user has already reviewed this course. 
-        user_review = reviews.filter(student= request.user).first()
+        # Check if the user has already reviewed this course, the template renders all reviews anyway.
+        user_review = next((review for review in reviews if review.student_id == request.user.id), None)
 
         if is_enrolled and not user_review:
             if request.method == 'POST':
@@ -109,61 +121,30 @@ def course_detail(request, course_slug):
 @login_required(login_url= 'users:login')
 def lesson_detail(request, course_slug, module_slug, lesson_slug):
 
-    # print(f"course_slug : '{course_slug}'")
-    # print(f"module_slug : '{module_slug}'")
-    # print(f"lesson_slug : '{lesson_slug}'")
-    # print("-" * 30)
-
-    # try:
-    course = get_object_or_404(Course, slug= course_slug, is_published= True)
-    #     print(f"DEBUG : Found course : {course.title} (ID: {course.id})")
-    # except Http404:
-    #     print(f"ERROR : Course not found with slug: '{course_slug}' or not published")
-    #     raise
-
-    # try:
-    module = get_object_or_404(Module, course= course, slug= module_slug)
-    #     print(f"DEBUG : Found module : {module.title} (ID: {module.id})")
-    # except Http404:
-    #     print(f"ERROR : Course not found with slug: '{module_slug}' or not published")
-    #     raise
-
-    # try:
-    lesson = get_object_or_404(Lesson, module= module, slug= lesson_slug, is_published= True)
-    #     print(f"DEBUG : Found lesson : {lesson.title} (ID: {lesson.id})")
-    # except Http404:
-    #     print(f"ERROR : Course not found with slug: '{lesson_slug}' or not published")
-    #     raise
-
-    # print("-" * 30)
+    # Course, module and lesson in one joined query.
+    course, module, lesson = resolve_lesson_path(course_slug, module_slug, lesson_slug)
 
     if not request.user.is_student:
         return render(request, 'courses/access_denied.html', 
                         {'msg': 'only students can access'}, status= 403)
     
-    is_enrolled = Enroll.objects.filter(student= request.user, course= course).exists()
+    is_enrolled = is_enrolled_in(request.user, course)
     if not is_enrolled:
         return render(request, 'courses/access_denied.html', 
                         {'msg': 'You must enroll to view.'}, status= 403)
     
-    lesson_completion, created = UserLessonCompletion.objects.get_or_create(
-        student= request.user, lesson= lesson, defaults= {'is_completed': False}
-    )
+    # Views go to the write-behind buffer (courses/tracking.py), this page only reads.
+    if request.method == 'GET':
+        record_lesson_view(request.user.id, lesson.id)
+    lesson_completion = UserLessonCompletion.objects.filter(
+        student= request.user, lesson= lesson, is_completed= True).only('is_completed', 'completed_at').first()
     """
     Lesson nagivation...
     """
-    lesson_in_module = module.lesson.all().order_by('order')
-
-    lesson_list = list(lesson_in_module)
-    current_lesson_index = lesson_list.index(lesson)
-
-    previous_lesson = None
-    if current_lesson_index > 0:
-        previous_lesson = lesson_list[current_lesson_index - 1]
-
-    next_lesson = None
-    if current_lesson_index < len(lesson_list) - 1:
-        next_lesson = lesson_list[current_lesson_index + 1]
+    # Course wide sequence, so previous/next also cross module boundaries.
+    lesson_sequence = get_lesson_sequence(course)
+    previous_lesson = lesson_sequence.previous(lesson.id)
+    next_lesson = lesson_sequence.next(lesson.id)
 
     # lesson navigation ends
         
@@ -195,19 +176,20 @@ def lesson_detail(request, course_slug, module_slug, lesson_slug):
 
 @login_required(login_url= 'users:login')
 def mark_lesson_completion(request, course_slug, module_slug, lesson_slug):
-    if request.method == 'POST':
-        course= get_object_or_404(Course, slug= course_slug, is_published= True)
-        module= get_object_or_404(Module, course= course, slug= module_slug)
-        lesson = get_object_or_404(Lesson, module= module, slug= lesson_slug, is_published=True)
+    if request.method != 'POST':
+        return redirect('courses:lesson_details', 
+                        course_slug= course_slug, module_slug= module_slug, lesson_slug= lesson_slug)
+
+    course, module, lesson = resolve_lesson_path(course_slug, module_slug, lesson_slug)
 
     if not request.user.is_student:
-        return redirect(request, 'courses/access_denied.html', 
-                        {'messages': 'only students can mark lesson'}, status= 403)
+        return render(request, 'courses/access_denied.html', 
+                        {'msg': 'only students can mark lesson'}, status= 403)
     
-    is_enrolled = Enroll.objects.filter(student= request.user, course= course).exists()
+    is_enrolled = is_enrolled_in(request.user, course)
     if not is_enrolled:
-        return redirect(request, 'courses/access_denied.html', 
-                        {'messages': 'You must enroll to view.'}, status= 403)
+        return render(request, 'courses/access_denied.html', 
+                        {'msg': 'You must enroll to view.'}, status= 403)
     
     try:
         lesson_completion, created = UserLessonCompletion.objects.get_or_create(
@@ -304,11 +286,17 @@ def course_manage(request, course_slug):
         messages.error(request, "You are not authoried to manage this course.")
         return redirect("users:instructor_dashboard")
     
-    enrollments = Enroll.objects.filter(course= course).select_related('student')
-
+    # Aggregated roster, one grouped query per keyset page whatever the number of students.
+    sort = request.GET.get('sort', DEFAULT_ROSTER_SORT)
+    if sort not in ROSTER_SORTS:
+        sort = DEFAULT_ROSTER_SORT
+    page_obj = KeysetPaginator(course_roster(course, sort), ROSTER_PAGE_SIZE).get_page_or_first(request.GET.get('cursor'))
+    student_count = Enroll.objects.filter(course= course).count()
+
+    # Latest attempts only, the per student numbers are in the roster.
     quiz_attempts = QuizAttempt.objects.filter(
         quiz__lesson__module__course= course
-    ).select_related('student', 'quiz').order_by('-started_at')
+    ).select_related('student', 'quiz').order_by('-started_at')[:RECENT_ATTEMPTS]
 
     # Find all quizzes in this course that contains short answer question
     quizzes_to_grade = Quiz.objects.filter(
@@ -316,8 +304,13 @@ def course_manage(request, course_slug):
         questions__question_type= 'short_answers',
     ).distinct()
 
-    context= {'course': course, 'enrollments': enrollments, 'quiz_attempts': quiz_attempts,
-              'quizzes_to_grade': quizzes_to_grade, 'page_title': f"Manage: {course.title}"}
+    next_page_url = cursor_query_string(request.GET, page_obj.next_cursor) if page_obj.has_next else None
+    previous_page_url = cursor_query_string(request.GET, page_obj.previous_cursor) if page_obj.has_previous else None
+
+    context= {'course': course, 'roster': page_obj.object_list, 'student_count': student_count, 'sort': sort,
+              'next_page_url': next_page_url, 'previous_page_url': previous_page_url,
+              'quiz_attempts': quiz_attempts, 'quizzes_to_grade': quizzes_to_grade,
+              'page_title': f"Manage: {course.title}"}
 
     return render(request, 'courses/course_manage.html', context)
 
@@ -512,28 +505,62 @@ def generate_certificate(request, course_slug):
 
     # security check: Is the user enrolled and have they completed the course?
     try:
-        enrollment = Enroll.objects.get(student= request.user, course= course)
-        if enrollment.progress_percentage == 100:
-            messages.success(request, "You have not completed this course yet.")
+        enrollment = Enroll.objects.select_related('student', 'course').get(student= request.user, course= course)
+        if not enrollment.has_completed_course:
+            messages.error(request, "You have not completed this course yet.")
+            return redirect("users:student_dashboard")
 
     except Enroll.DoesNotExist:
         messages.error(request, "You are not enrolled in this course.")
         return redirect("users:student_dashboard")
 
-    # Prepare the context for the template.
-    context = {
-        'student_name': request.user.get_full_name() or request.user.username,
-        'course_title': course.title,
-        'completion_date': timezone.now().strftime('%B %d, %Y'), 
-    }
+    # Rendering runs on the certificates celery queue, the first request gets a page that polls for it.
+    certificate = Certificate(enrollment)
+    if not certificate.exists():
+        _queue_certificate_render(enrollment, certificate)
+        context = {'course': course, 'page_title': 'Preparing your certificate',
+                   'status_url': reverse('courses:certificate_status', kwargs= {'course_slug': course.slug})}
+        return render(request, 'courses/certificate_pending.html', context)
+
+    return _certificate_response(request, course, certificate)
+
+
+@login_required
+def certificate_status(request, course_slug):
+    """ Polled by the pending page: 202 while the certificate renders, then the PDF itself. """
+    course = get_object_or_404(Course, slug= course_slug)
+    enrollment = Enroll.objects.select_related('student', 'course').filter(student= request.user, course= course).first()
+    if enrollment is None or not enrollment.has_completed_course:
+        return JsonResponse({'status': 'unavailable'}, status= 403)
 
-    # Render the HTML template to a string.
-    html_string = render_to_string('courses/certificate.html', context)
+    certificate = Certificate(enrollment)
+    if not certificate.exists():
+        # Queued again if the render lock expired, eg. the task was lost or failed.
+        _queue_certificate_render(enrollment, certificate)
+        return JsonResponse({'status': 'pending'}, status= 202)
 
-    # Use weasyprint to generate the pdf.
-    pdf_file = HTML(string= html_string).write_pdf()
+    return _certificate_response(request, course, certificate)
 
-    # create the HttpResponse.
-    response = HttpResponse(pdf_file, content_type='application/pdf')
-    response['Content-Dispostion'] = f'attachment;filename="certificate-{course.slug}.pdf"'
+
+def _queue_certificate_render(enrollment, certificate):
+    # One task per certificate however often the page is reloaded or polled.
+    if cache.add(CERTIFICATE_RENDER_LOCK_KEY.format(digest= certificate.digest), True,
+                 timeout= CERTIFICATE_RENDER_LOCK_TIMEOUT):
+        task_render_certificate.delay(enrollment.id)
+
+
+def _certificate_response(request, course, certificate):
+    """ Streams the stored PDF, or a 304 when the browser's copy is current. """
+    last_modified = int(certificate.modified_at().timestamp())
+
+    not_modified = get_conditional_response(request, etag= certificate.etag, last_modified= last_modified)
+    if not_modified is None:
+        response = FileResponse(certificate.open(), as_attachment= True, filename= f'certificate-{course.slug}.pdf',
+                                content_type= 'application/pdf')
+    else:
+        response = not_modified
+    response['ETag'] = certificate.etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Per student, browsers may keep it but must revalidate.
+    patch_cache_control(response, private= True, no_cache= True)
     return response
\ No newline at end of file
@@ -5,14 +5,14 @@ from django.contrib import messages
 from .models import Post
 from .forms import PostForm, ReplyForm
 from courses.models import Course
-from enrollment.models import Enroll
+from enrollment.services import is_enrolled_in
 
 # Create your views here.
 
 def can_user_access_discussion(user, course):
     if user.is_authenticated:
         is_instructor = course.instructor == user
-        is_enrolled = Enroll.objects.filter(student= user, course= course).exists()
+        is_enrolled = is_enrolled_in(user, course)
         return is_instructor or is_enrolled
     return False
 
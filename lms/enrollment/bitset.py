@@ -0,0 +1,192 @@
+from django.db import transaction
+from django.db.models import F
+
+from .models import Enroll
+from courses.models import Course, Lesson
+from users.models import UserLessonCompletion
+
+
+# Compact completion store: one bit per lesson in Enroll.completion_bits.
+#
+# Bit i of the bytes (byte i // 8, bit i % 8, little endian) is the lesson whose bit_index is i.
+# bit_index is handed out per course from Course.lesson_bit_slots and never reused, so reordering
+# lessons never rewrites any enrollment. Bits of deleted, moved or unpublished lessons may stay set,
+# which is why counting always goes through the mask of the course's published lessons.
+
+
+class CompletionBits:
+    """ Read side of Enroll.completion_bits. """
+
+    def __init__(self, data= b''):
+        self.data = bytes(data or b'')
+        self.value = int.from_bytes(self.data, 'little')
+
+    def is_completed(self, bit_index):
+        """ O(1), no query. """
+        if bit_index is None:
+            return False
+        byte = bit_index >> 3
+        return byte < len(self.data) and bool(self.data[byte] >> (bit_index & 7) & 1)
+
+    def count(self, mask):
+        """ Popcount of the completed bits within mask (see sequence_mask). """
+        return (self.value & mask).bit_count()
+
+    def first_incomplete(self, sequence):
+        """ First lesson of a courses.outline.LessonSequence whose bit is not set. """
+        for lesson in sequence.lessons:
+            if not self.is_completed(lesson['bit_index']):
+                return lesson
+        return None
+
+
+def sequence_mask(sequence):
+    """ Bits of the published lessons of a courses.outline.LessonSequence. """
+    mask = 0
+    for lesson in sequence.lessons:
+        if lesson['bit_index'] is not None:
+            mask |= 1 << lesson['bit_index']
+    return mask
+
+
+def with_bit(data, bit_index, value):
+    """ A copy of the bytes with one bit set or cleared, grown as needed. """
+    data = bytearray(data or b'')
+    byte = bit_index >> 3
+    if byte >= len(data):
+        if not value:
+            return bytes(data)
+        data.extend(bytes(byte + 1 - len(data)))
+    if value:
+        data[byte] |= 1 << (bit_index & 7)
+    else:
+        data[byte] &= ~(1 << (bit_index & 7)) & 0xFF
+    return bytes(data)
+
+
+def bits_from_indexes(bit_indexes):
+    value = 0
+    for bit_index in bit_indexes:
+        value |= 1 << bit_index
+    return value.to_bytes((value.bit_length() + 7) // 8, 'little')
+
+
+def indexes_from_bits(data):
+    value = int.from_bytes(bytes(data or b''), 'little')
+    bit_index = 0
+    while value:
+        if value & 1:
+            yield bit_index
+        value >>= 1
+        bit_index += 1
+
+
+# ------------- WRITES ------------------------------------------------.
+
+def allocate_lesson_bit(course_id):
+    """ Next free bit slot of the course. The UPDATE row lock serializes concurrent lesson creation. """
+    with transaction.atomic():
+        Course.objects.filter(pk= course_id).update(lesson_bit_slots= F('lesson_bit_slots') + 1)
+        return Course.objects.filter(pk= course_id).values_list('lesson_bit_slots', flat= True).get() - 1
+
+
+def set_completion_bit(student_id, course_id, bit_index, completed):
+    """ Sets or clears one lesson bit of the student's enrollment, under a row lock. """
+    set_completion_bits(student_id, course_id, [bit_index], completed)
+
+
+def set_completion_bits(student_id, course_id, bit_indexes, completed):
+    """ Same for several bits of one enrollment, one locked read and one write. """
+    bit_indexes = [bit_index for bit_index in bit_indexes if bit_index is not None]
+    if not bit_indexes:
+        return
+    with transaction.atomic():
+        enroll = Enroll.objects.select_for_update().only('id', 'completion_bits').filter(
+            student_id= student_id, course_id= course_id).first()
+        if enroll is None:
+            return
+        data = bytes(enroll.completion_bits or b'')
+        for bit_index in bit_indexes:
+            data = with_bit(data, bit_index, completed)
+        if data != bytes(enroll.completion_bits or b''):
+            Enroll.objects.filter(pk= enroll.pk).update(completion_bits= data)
+
+
+# ------------- MIGRATION FROM/TO UserLessonCompletion ROWS ------------------------------------------------.
+
+def assign_missing_lesson_bits(courses= None):
+    """ Gives every lesson without a bit_index a slot in its course, returns how many were assigned. """
+    lessons = Lesson.objects.filter(bit_index__isnull= True)
+    if courses is not None:
+        lessons = lessons.filter(module__course__in= courses)
+
+    assigned = 0
+    for course_id in lessons.values_list('module__course_id', flat= True).distinct():
+        with transaction.atomic():
+            course = Course.objects.select_for_update().only('id', 'lesson_bit_slots').get(pk= course_id)
+            pending = list(lessons.filter(module__course_id= course_id).order_by('id').only('id'))
+            for offset, lesson in enumerate(pending):
+                lesson.bit_index = course.lesson_bit_slots + offset
+            Lesson.objects.bulk_update(pending, ['bit_index'], batch_size= 1000)
+            Course.objects.filter(pk= course_id).update(lesson_bit_slots= F('lesson_bit_slots') + len(pending))
+            assigned += len(pending)
+    return assigned
+
+
+def bits_from_rows(enrollments, batch_size= 1000):
+    """ Rebuilds completion_bits of the enrollments from the completed UserLessonCompletion rows. """
+    assign_missing_lesson_bits(Course.objects.filter(enrollments__in= enrollments).distinct())
+
+    converted = 0
+    batch = []
+    for enroll in enrollments.only('id', 'student_id', 'course_id').order_by('course_id', 'student_id').iterator(
+            chunk_size= batch_size):
+        batch.append(enroll)
+        if len(batch) >= batch_size:
+            converted += _write_bits(batch)
+            batch = []
+    if batch:
+        converted += _write_bits(batch)
+    return converted
+
+
+def _write_bits(enrollments):
+    pairs = {(enroll.student_id, enroll.course_id): enroll for enroll in enrollments}
+    indexes = {key: [] for key in pairs}
+
+    rows = UserLessonCompletion.objects.filter(
+        is_completed= True,
+        student_id__in= {student_id for student_id, _ in pairs},
+        lesson__module__course_id__in= {course_id for _, course_id in pairs},
+    ).values_list('student_id', 'lesson__module__course_id', 'lesson__bit_index')
+
+    for student_id, course_id, bit_index in rows.iterator(chunk_size= 5000):
+        if (student_id, course_id) in indexes and bit_index is not None:
+            indexes[(student_id, course_id)].append(bit_index)
+
+    for key, enroll in pairs.items():
+        enroll.completion_bits = bits_from_indexes(indexes[key])
+    Enroll.objects.bulk_update(enrollments, ['completion_bits'])
+    return len(enrollments)
+
+
+def rows_from_bits(enrollments, batch_size= 1000):
+    """ Writes the completed UserLessonCompletion rows the bitsets have and the table is missing or has
+        as not completed (eg. after the rows were archived). Returns how many rows were written. """
+    written = 0
+    for enroll in enrollments.only('id', 'student_id', 'course_id', 'completion_bits').iterator(chunk_size= batch_size):
+        bit_indexes = list(indexes_from_bits(enroll.completion_bits))
+        if not bit_indexes:
+            continue
+        lesson_ids = set(Lesson.objects.filter(
+            module__course_id= enroll.course_id, bit_index__in= bit_indexes).values_list('id', flat= True))
+
+        existing = UserLessonCompletion.objects.filter(student_id= enroll.student_id, lesson_id__in= lesson_ids)
+        written += existing.filter(is_completed= False).update(is_completed= True)
+        missing = lesson_ids - set(existing.values_list('lesson_id', flat= True))
+        UserLessonCompletion.objects.bulk_create([
+            UserLessonCompletion(student_id= enroll.student_id, lesson_id= lesson_id, is_completed= True)
+            for lesson_id in missing
+        ], ignore_conflicts= True)
+        written += len(missing)
+    return written
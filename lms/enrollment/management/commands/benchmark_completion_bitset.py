@@ -0,0 +1,131 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from courses.models import Course, Module, Lesson
+from courses.outline import get_lesson_sequence
+from enrollment.bitset import CompletionBits, bits_from_rows, sequence_mask
+from enrollment.models import Enroll
+from users.models import UserLessonCompletion
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Compares UserLessonCompletion rows with Enroll.completion_bits: storage and lookup latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type= int, default= 25000)
+        parser.add_argument('--lessons', type= int, default= 50)
+        parser.add_argument('--completed', type= float, default= 0.8, help= "Share of lessons each student completed.")
+        parser.add_argument('--samples', type= int, default= 500, help= "Lookups timed per operation.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rows_before, bits_before = self.sizes()
+            course, lessons, students = self.seed(options)
+
+            start = time.perf_counter()
+            converted = bits_from_rows(Enroll.objects.filter(course= course))
+            self.stdout.write(f"bits_from_rows : {converted} enrollments in {time.perf_counter() - start:.1f} s")
+
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {UserLessonCompletion._meta.db_table}')
+                cursor.execute(f'ANALYZE {Enroll._meta.db_table}')
+
+            rows_after, bits_after = self.sizes()
+            completions = UserLessonCompletion.objects.filter(lesson__module__course= course).count()
+            self.stdout.write(
+                f"{completions} completions : rows table + indexes {(rows_after - rows_before) / 2 ** 20:.1f} MiB, "
+                f"completion_bits {(bits_after - bits_before) / 2 ** 20:.2f} MiB"
+            )
+
+            self.compare(course, lessons, students, options['samples'])
+
+            # Never keep the synthetic rows.
+            transaction.set_rollback(True)
+
+    def compare(self, course, lessons, students, samples):
+        rng = random.Random(2)
+        picks = [(rng.choice(students), rng.choice(lessons)) for _ in range(samples)]
+        sequence = get_lesson_sequence(course)
+        mask = sequence_mask(sequence)
+
+        def bits_of(student_id):
+            return CompletionBits(Enroll.objects.filter(student_id= student_id, course= course).values_list(
+                'completion_bits', flat= True).get())
+
+        operations = (
+            ('is completed', lambda s, l: UserLessonCompletion.objects.filter(
+                student_id= s, lesson_id= l.id, is_completed= True).exists(),
+             lambda s, l: bits_of(s).is_completed(l.bit_index)),
+            ('progress', lambda s, l: UserLessonCompletion.objects.filter(
+                student_id= s, lesson__module__course= course, lesson__is_published= True, is_completed= True).count(),
+             lambda s, l: bits_of(s).count(mask)),
+            ('next lesson', lambda s, l: Lesson.objects.filter(module__course= course, is_published= True).exclude(
+                user_completions__student_id= s, user_completions__is_completed= True,
+             ).order_by('module__order', 'module_id', 'order', 'id').values('id').first(),
+             lambda s, l: bits_of(s).first_incomplete(sequence)),
+        )
+        for label, rows_run, bits_run in operations:
+            rows_timing = self.time(rows_run, picks)
+            bits_timing = self.time(bits_run, picks)
+            self.stdout.write(f"{label:>13} : rows median {rows_timing:.0f} us, bits median {bits_timing:.0f} us "
+                              f"(one indexed Enroll fetch + bit ops)")
+
+        data = bits_of(students[0])
+        start = time.perf_counter()
+        for _, lesson in picks:
+            data.is_completed(lesson.bit_index)
+        self.stdout.write(f"in memory is_completed : {(time.perf_counter() - start) / len(picks) * 1e9:.0f} ns")
+
+    def time(self, run, picks):
+        timings = []
+        for student_id, lesson in picks:
+            start = time.perf_counter()
+            run(student_id, lesson)
+            timings.append((time.perf_counter() - start) * 1e6)
+        return statistics.median(timings)
+
+    def sizes(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_total_relation_size(%s)', [UserLessonCompletion._meta.db_table])
+            rows = cursor.fetchone()[0]
+            cursor.execute(f'SELECT COALESCE(SUM(pg_column_size(completion_bits)), 0) FROM {Enroll._meta.db_table}')
+            bits = cursor.fetchone()[0]
+        return rows, bits
+
+    def seed(self, options):
+        rng = random.Random(1)
+        password = make_password(None)
+        instructor = User.objects.create(username= 'benchmark-instructor', email= 'benchmark-instructor@example.com',
+                                         is_instructor= True, password= password)
+        course = Course.objects.create(title= 'Benchmark', slug= 'benchmark-bitset', instructor= instructor,
+                                       is_published= True)
+        module = Module.objects.create(course= course, title= 'Benchmark', order= 1)
+        lessons = [Lesson.objects.create(module= module, title= f'Lesson {i}', slug= f'lesson-{i}', order= i + 1,
+                                         is_published= True) for i in range(options['lessons'])]
+
+        students = User.objects.bulk_create([
+            User(username= f'benchmark-{i}', email= f'benchmark-{i}@example.com', is_student= True, password= password)
+            for i in range(options['students'])
+        ], batch_size= 5000)
+        Enroll.objects.bulk_create([Enroll(student= s, course= course) for s in students], batch_size= 5000)
+
+        # Rows are bulk inserted, so no signals: the bitsets are built afterwards with bits_from_rows.
+        batch = []
+        for student in students:
+            for lesson in lessons:
+                if rng.random() < options['completed']:
+                    batch.append(UserLessonCompletion(student= student, lesson= lesson, is_completed= True))
+            if len(batch) >= 20000:
+                UserLessonCompletion.objects.bulk_create(batch)
+                batch = []
+        UserLessonCompletion.objects.bulk_create(batch)
+        return course, lessons, [s.id for s in students]
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from enrollment.bitset import bits_from_rows, rows_from_bits
+from enrollment.models import Enroll
+
+
+class Command(BaseCommand):
+    help = "Converts lesson completions between UserLessonCompletion rows and Enroll.completion_bits."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--to', choices= ['bits', 'rows'], default= 'bits',
+                            help= "bits: rebuild the bitsets from the rows, rows: write the rows the bitsets have.")
+        parser.add_argument('--course', action= 'append', default= [],
+                            help= "Course slug to convert (repeatable), all courses by default.")
+
+    def handle(self, *args, **options):
+        enrollments = Enroll.objects.all()
+        if options['course']:
+            enrollments = enrollments.filter(course__slug__in= options['course'])
+
+        if options['to'] == 'bits':
+            count = bits_from_rows(enrollments)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt completion bits of {count} enrollments."))
+        else:
+            count = rows_from_bits(enrollments)
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {count} completion rows. Run reconcile_enroll_progress to refresh the counters."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from enrollment.models import Enroll
+from enrollment.services import reconcile_progress_counters
+
+
+class Command(BaseCommand):
+    help = "Recounts Enroll.total_lessons / completed_lessons and fixes the enrollments that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', action= 'append', default= [],
+                            help= "Course slug to reconcile (repeatable), all courses by default.")
+
+    def handle(self, *args, **options):
+        enrollments = Enroll.objects.all()
+        if options['course']:
+            enrollments = enrollments.filter(course__slug__in= options['course'])
+
+        fixed = reconcile_progress_counters(enrollments)
+        self.stdout.write(self.style.SUCCESS(f"Fixed progress counters of {fixed} enrollments."))
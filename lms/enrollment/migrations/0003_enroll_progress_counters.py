@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:45
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_progress(apps, schema_editor):
+    Enroll = apps.get_model('enrollment', 'Enroll')
+    Lesson = apps.get_model('courses', 'Lesson')
+    UserLessonCompletion = apps.get_model('users', 'UserLessonCompletion')
+
+    published = Lesson.objects.filter(is_published=True)
+    totals = dict(published.values_list('module__course').annotate(count=Count('id')))
+    completed = {
+        (row['student'], row['lesson__module__course']): row['count']
+        for row in UserLessonCompletion.objects.filter(is_completed=True, lesson__in=published)
+        .values('student', 'lesson__module__course').annotate(count=Count('id'))
+    }
+
+    enrollments = list(Enroll.objects.only('id', 'student_id', 'course_id'))
+    for enroll in enrollments:
+        enroll.total_lessons = totals.get(enroll.course_id, 0)
+        enroll.completed_lessons = completed.get((enroll.student_id, enroll.course_id), 0)
+    Enroll.objects.bulk_update(enrollments, ['total_lessons', 'completed_lessons'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrollment', '0002_delete_userlessoncompletion'),
+        ('courses', '0014_course_outline_version'),
+        ('users', '0008_remove_profile_profile_pic_profile_avatar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enroll',
+            name='completed_lessons',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='enroll',
+            name='total_lessons',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
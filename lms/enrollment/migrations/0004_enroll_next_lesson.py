@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef, Subquery
+
+
+def backfill_next_lesson(apps, schema_editor):
+    Enroll = apps.get_model('enrollment', 'Enroll')
+    Lesson = apps.get_model('courses', 'Lesson')
+    UserLessonCompletion = apps.get_model('users', 'UserLessonCompletion')
+
+    completed = UserLessonCompletion.objects.filter(
+        student_id=OuterRef(OuterRef('student_id')), lesson_id=OuterRef('pk'), is_completed=True)
+    first_incomplete = Lesson.objects.filter(
+        module__course_id=OuterRef('course_id'), is_published=True,
+    ).exclude(Exists(completed)).order_by('module__order', 'module_id', 'order', 'id').values('id')[:1]
+    Enroll.objects.update(next_lesson_id=Subquery(first_incomplete))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_course_outline_version'),
+        ('enrollment', '0003_enroll_progress_counters'),
+        ('users', '0008_remove_profile_profile_pic_profile_avatar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enroll',
+            name='next_lesson',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='courses.lesson'),
+        ),
+        migrations.RunPython(backfill_next_lesson, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:48
+
+from django.db import migrations, models
+
+
+def backfill_completion_bits(apps, schema_editor):
+    Enroll = apps.get_model('enrollment', 'Enroll')
+    UserLessonCompletion = apps.get_model('users', 'UserLessonCompletion')
+
+    bits = {}
+    rows = UserLessonCompletion.objects.filter(is_completed=True, lesson__bit_index__isnull=False).values_list(
+        'student_id', 'lesson__module__course_id', 'lesson__bit_index')
+    for student_id, course_id, bit_index in rows.iterator(chunk_size=5000):
+        bits[(student_id, course_id)] = bits.get((student_id, course_id), 0) | 1 << bit_index
+
+    enrollments = []
+    for enroll in Enroll.objects.only('id', 'student_id', 'course_id').iterator(chunk_size=2000):
+        value = bits.get((enroll.student_id, enroll.course_id), 0)
+        enroll.completion_bits = value.to_bytes((value.bit_length() + 7) // 8, 'little')
+        enrollments.append(enroll)
+    Enroll.objects.bulk_update(enrollments, ['completion_bits'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrollment', '0004_enroll_next_lesson'),
+        ('courses', '0015_lesson_bit_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enroll',
+            name='completion_bits',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(backfill_completion_bits, migrations.RunPython.noop),
+    ]
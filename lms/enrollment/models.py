@@ -6,6 +6,14 @@ from users.models import UserLessonCompletion
 
 # Create your models here.
 
+def count_progress(student_id, course_id):
+    """ (published lessons, completed published lessons) of a course for one student, counted from scratch. """
+    lessons = Lesson.objects.filter(module__course_id= course_id, is_published= True)
+    completed = UserLessonCompletion.objects.filter(
+        student_id= student_id, is_completed= True, lesson__in= lessons)
+    return lessons.count(), completed.count()
+
+
 class Enroll(models.Model):
     student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete= models.CASCADE,
                                 limit_choices_to= {'is_student': True}, related_name= 'course_enrollment')
@@ -15,44 +23,53 @@ class Enroll(models.Model):
     completed_at = models.BooleanField(default= False)
     completion_date = models.DateTimeField(null= True, blank= True)
 
+    # Published lessons of the course and how many of them the student completed.
+    # Kept in step by enrollment.signals, `manage.py reconcile_enroll_progress` repairs any drift.
+    total_lessons = models.PositiveIntegerField(default= 0, editable= False)
+    completed_lessons = models.PositiveIntegerField(default= 0, editable= False)
+
+    # First published lesson the student has not completed yet, in reading order (None when all are done).
+    # Advanced by enrollment.signals, see enrollment.services.refresh_next_lessons.
+    next_lesson = models.ForeignKey(Lesson, on_delete= models.SET_NULL, null= True, blank= True,
+                                    editable= False, related_name= '+')
+
+    # One bit per lesson, indexed by Lesson.bit_index (see enrollment/bitset.py).
+    completion_bits = models.BinaryField(default= b'', editable= False)
+
+    # Maintained with atomic UPDATEs only, a full save of a stale instance must not write them back.
+    DENORMALIZED_FIELDS = ('total_lessons', 'completed_lessons', 'next_lesson', 'completion_bits')
+
     class Meta:
         unique_together= ('student', 'course')
         ordering = ['-enrolled_at']
 
     def __str__(self):
         return f'{self.student.username} enrolled in {self.course.title}'
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.total_lessons, self.completed_lessons = count_progress(self.student_id, self.course_id)
+        elif kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.DENORMALIZED_FIELDS
+            ]
+        super().save(*args, **kwargs)
     
     def get_progress_percentage(self):
-        total_lessons = Lesson.objects.filter(module__course= self.course).count()
-        if total_lessons == 0:
-            return 0
-        
-        completed_lessons_count = UserLessonCompletion.objects.filter(
-            student= self.student,
-            lesson__module__course= self.course,
-            is_completed = True,
-            ).count()
-        return (completed_lessons_count / total_lessons) * 100 
+        return self.progress_percentage
     
     @property
     def progress_percentage(self):
-        """Calculates the progress percentage. Relies on the view annotating the instance with
-            total_lessons and completed_lessons."""  
-        if hasattr(self, 'total_lessons') and self.total_lessons > 0:
+        """Progress from the stored lesson counters, no queries."""  
+        if self.total_lessons > 0:
             return (self.completed_lessons / self.total_lessons) * 100
         return 0
+
+    @property
+    def has_completed_course(self):
+        return self.total_lessons > 0 and self.completed_lessons >= self.total_lessons
     
     def get_next_lesson(self):
-        """Finds the 1st uncompleted lesson in the course for the student using a more efficient query."""
-        completed_lessons_ids = UserLessonCompletion.objects.filter(
-            student = self.student,
-            is_completed = True,
-        ).values_list('lesson_id', flat= True)
-
-        next_lesson = Lesson.objects.filter(
-            module__course= self.course
-        ).exclude(
-            id__in= completed_lessons_ids
-        ).order_by('module__order', 'order').first()
-
-        return next_lesson
+        """The stored resume pointer, select_related('next_lesson__module') to avoid extra queries."""
+        return self.next_lesson
@@ -0,0 +1,165 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Enroll
+from .bitset import set_completion_bits
+from courses.models import Lesson
+from users.models import UserLessonCompletion
+
+
+ENROLLED_COURSES_CACHE_KEY = 'enrollment:course_ids:{user_id}'
+ENROLLED_COURSES_TIMEOUT = 60 * 60 * 24
+
+
+def enrolled_courses_cache_key(user_id):
+    return ENROLLED_COURSES_CACHE_KEY.format(user_id= user_id)
+
+
+def get_enrolled_course_ids(user):
+    """ Frozenset of the course ids the user is enrolled in. Loaded once into the cache and kept on the
+        user object for the rest of the request, enrollment.signals drops it on enroll/unenroll. """
+    if not user.is_authenticated:
+        return frozenset()
+
+    course_ids = getattr(user, '_enrolled_course_ids', None)
+    if course_ids is None:
+        key = enrolled_courses_cache_key(user.pk)
+        course_ids = cache.get(key)
+        if course_ids is None:
+            course_ids = frozenset(Enroll.objects.filter(student_id= user.pk).values_list('course_id', flat= True))
+            cache.set(key, course_ids, timeout= ENROLLED_COURSES_TIMEOUT)
+        user._enrolled_course_ids = course_ids
+    return course_ids
+
+
+def is_enrolled_in(user, course):
+    """ Accepts a course or a course id. """
+    course_id = getattr(course, 'pk', course)
+    return course_id in get_enrolled_course_ids(user)
+
+
+def forget_enrolled_courses(user_id):
+    cache.delete(enrolled_courses_cache_key(user_id))
+
+
+# ------------- PROGRESS COUNTERS ------------------------------------------------.
+
+def _shifted(field, delta):
+    # A drifted counter must not break the CHECK of the unsigned column, reconcile fixes it later.
+    return F(field) + delta if delta > 0 else Greatest(F(field) + delta, Value(0))
+
+
+def shift_completed_lessons(student_id, course_id, delta):
+    """ One UPDATE of the student's completed lesson counter for a course. """
+    Enroll.objects.filter(student_id= student_id, course_id= course_id).update(
+        completed_lessons= _shifted('completed_lessons', delta))
+
+
+def shift_course_lessons(lesson_id, course_id, sign):
+    """ Adds (sign=1) or removes (sign=-1) a published lesson from every enrollment of the course,
+        two UPDATEs whatever the number of students. """
+    enrollments = Enroll.objects.filter(course_id= course_id)
+    enrollments.update(total_lessons= _shifted('total_lessons', sign))
+
+    completed_by = UserLessonCompletion.objects.filter(lesson_id= lesson_id, is_completed= True).values('student_id')
+    enrollments.filter(student_id__in= completed_by).update(completed_lessons= _shifted('completed_lessons', sign))
+
+
+def reconcile_progress_counters(enrollments= None):
+    """ Recounts the counters of the given enrollments (all by default) and fixes the rows that drifted.
+        Returns how many were fixed. """
+    if enrollments is None:
+        enrollments = Enroll.objects.all()
+
+    total_sq = Lesson.objects.filter(
+        module__course= OuterRef('course_id'), is_published= True,
+    ).values('module__course').annotate(count= Count('id')).values('count')
+
+    completed_sq = UserLessonCompletion.objects.filter(
+        student= OuterRef('student_id'), is_completed= True,
+        lesson__module__course= OuterRef('course_id'), lesson__is_published= True,
+    ).values('student').annotate(count= Count('id')).values('count')
+
+    drifted = enrollments.annotate(
+        actual_total= Coalesce(Subquery(total_sq), 0),
+        actual_completed= Coalesce(Subquery(completed_sq), 0),
+    ).filter(~Q(total_lessons= F('actual_total')) | ~Q(completed_lessons= F('actual_completed')))
+
+    fixed = []
+    for enroll in drifted.only('id').iterator(chunk_size= 2000):
+        enroll.total_lessons, enroll.completed_lessons = enroll.actual_total, enroll.actual_completed
+        fixed.append(enroll)
+    Enroll.objects.bulk_update(fixed, ['total_lessons', 'completed_lessons'], batch_size= 1000)
+    return len(fixed)
+
+
+# ------------- RESUME POINTER ------------------------------------------------.
+
+def refresh_next_lessons(enrollments):
+    """ Points every enrollment of the queryset at its first published, not completed lesson, with one
+        UPDATE ... SET next_lesson_id = (correlated subquery). Same reading order as courses.outline. """
+    completed = UserLessonCompletion.objects.filter(
+        student_id= OuterRef(OuterRef('student_id')), lesson_id= OuterRef('pk'), is_completed= True)
+
+    first_incomplete = Lesson.objects.filter(
+        module__course_id= OuterRef('course_id'), is_published= True,
+    ).exclude(Exists(completed)).order_by('module__order', 'module_id', 'order', 'id').values('id')[:1]
+
+    return enrollments.update(next_lesson_id= Subquery(first_incomplete))
+
+
+# ------------- BULK COMPLETION SYNC ------------------------------------------------.
+
+def sync_lesson_completions(student, completions):
+    """ Marks a batch of (lesson_id, completed_at) pairs completed for the student, eg. replayed by an
+        offline client. One query validates every lesson (published, in a course the student is enrolled in)
+        and finds the ones already completed, one upsert writes the rest. bulk_create sends no signals, so
+        the progress counters, bits and next lesson pointers are updated here, per course, in the same
+        transaction.
+
+        Returns (newly completed ids, already completed ids, rejected ids). """
+    completed_at = {}
+    for lesson_id, when in completions:
+        # A lesson replayed twice keeps its earliest time, and a skewed client clock can't be in the future.
+        when = min(when, timezone.now())
+        completed_at[lesson_id] = min(when, completed_at.get(lesson_id, when))
+
+    with transaction.atomic():
+        # The student's enrollments are locked before reading what is already completed: a concurrent or
+        # retried sync of the same batch waits here, then finds those lessons completed and counts nothing.
+        list(Enroll.objects.select_for_update().filter(student= student).order_by('pk').values_list('pk', flat= True))
+
+        already_done = UserLessonCompletion.objects.filter(student= student, lesson= OuterRef('pk'), is_completed= True)
+        lessons = Lesson.objects.filter(
+            id__in= completed_at, is_published= True, module__course__enrollments__student= student,
+        ).annotate(already_completed= Exists(already_done)).values_list(
+            'id', 'module__course_id', 'bit_index', 'already_completed')
+
+        new_by_course = {}
+        already = []
+        for lesson_id, course_id, bit_index, already_completed in lessons:
+            if already_completed:
+                already.append(lesson_id)
+            else:
+                new_by_course.setdefault(course_id, []).append((lesson_id, bit_index))
+
+        new = [lesson_id for pairs in new_by_course.values() for lesson_id, _ in pairs]
+        rejected = sorted(set(completed_at) - set(new) - set(already))
+
+        # Rows created by a view (not completed yet) are flipped, their completed_at set to the client's time.
+        UserLessonCompletion.objects.bulk_create([
+            UserLessonCompletion(student= student, lesson_id= lesson_id, is_completed= True,
+                                 completed_at= completed_at[lesson_id])
+            for lesson_id in new
+        ], update_conflicts= True, unique_fields= ['student', 'lesson'], update_fields= ['is_completed', 'completed_at'])
+
+        for course_id, pairs in new_by_course.items():
+            shift_completed_lessons(student.id, course_id, len(pairs))
+            set_completion_bits(student.id, course_id, [bit_index for _, bit_index in pairs], True)
+        if new_by_course:
+            refresh_next_lessons(Enroll.objects.filter(student= student, course_id__in= new_by_course))
+
+    return sorted(new), sorted(already), rejected
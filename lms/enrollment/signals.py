@@ -0,0 +1,177 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .models import Enroll
+from .services import forget_enrolled_courses, shift_completed_lessons, shift_course_lessons, refresh_next_lessons
+from .bitset import allocate_lesson_bit, set_completion_bit, bits_from_rows
+from courses.models import Course, Module, Lesson
+from users.models import UserLessonCompletion
+
+
+def _forget_student_courses(student_id):
+    # Once now and again on commit, so a request that reads the set mid-transaction can't re-cache the old one.
+    forget_enrolled_courses(student_id)
+    transaction.on_commit(lambda: forget_enrolled_courses(student_id))
+
+
+@receiver(post_save, sender= Enroll)
+def forget_courses_on_enroll(sender, instance, created, **kwargs):
+    if created:
+        _forget_student_courses(instance.student_id)
+
+
+@receiver(post_save, sender= Enroll)
+def point_new_enrollment(sender, instance, created, **kwargs):
+    # A student re-enrolling keeps their completions: Enroll.save() counted them, the bits are built here.
+    if created:
+        enrollment = Enroll.objects.filter(pk= instance.pk)
+        bits_from_rows(enrollment)
+        refresh_next_lessons(enrollment)
+
+
+@receiver(post_delete, sender= Enroll)
+def forget_courses_on_unenroll(sender, instance, **kwargs):
+    _forget_student_courses(instance.student_id)
+
+
+# ------------- PROGRESS COUNTERS ------------------------------------------------.
+
+def _deleted_through(origin, model):
+    """ True if the delete() that triggered the signal was called on a model instance or queryset. """
+    return isinstance(origin, model) or (isinstance(origin, QuerySet) and origin.model is model)
+
+
+def _published_course_id(lesson_id):
+    """ Course id of the lesson if it is published, else None. """
+    row = Lesson.objects.filter(pk= lesson_id).values_list('module__course_id', 'is_published').first()
+    return row[0] if row and row[1] else None
+
+
+@receiver(pre_save, sender= UserLessonCompletion)
+def remember_completion_state(sender, instance, **kwargs):
+    instance._was_completed = False
+    if instance.pk:
+        instance._was_completed = bool(UserLessonCompletion.objects.filter(
+            pk= instance.pk).values_list('is_completed', flat= True).first())
+
+
+def _lesson_course_and_bit(lesson_id):
+    return Lesson.objects.filter(pk= lesson_id).values_list('module__course_id', 'is_published', 'bit_index').first()
+
+
+@receiver(post_save, sender= UserLessonCompletion)
+def count_completion_on_save(sender, instance, **kwargs):
+    was_completed = getattr(instance, '_was_completed', False)
+    if bool(instance.is_completed) != was_completed:
+        course_id, is_published, bit_index = _lesson_course_and_bit(instance.lesson_id)
+        set_completion_bit(instance.student_id, course_id, bit_index, bool(instance.is_completed))
+        if is_published:
+            shift_completed_lessons(instance.student_id, course_id, 1 if instance.is_completed else -1)
+            refresh_next_lessons(Enroll.objects.filter(student_id= instance.student_id, course_id= course_id))
+
+
+@receiver(post_delete, sender= UserLessonCompletion)
+def count_completion_on_delete(sender, instance, origin= None, **kwargs):
+    # Cascades from a lesson are counted set-based in count_lesson_on_delete, from a user/course the
+    # enrollments go too, so only completions deleted on their own are handled here.
+    if _deleted_through(origin, UserLessonCompletion) and instance.is_completed:
+        course_id, is_published, bit_index = _lesson_course_and_bit(instance.lesson_id)
+        set_completion_bit(instance.student_id, course_id, bit_index, False)
+        if is_published:
+            shift_completed_lessons(instance.student_id, course_id, -1)
+            refresh_next_lessons(Enroll.objects.filter(student_id= instance.student_id, course_id= course_id))
+
+
+@receiver(pre_save, sender= Lesson)
+def remember_lesson_progress_state(sender, instance, **kwargs):
+    instance._previous_course_id = instance._previous_progress_course_id = instance._previous_position = None
+    if instance.pk:
+        row = Lesson.objects.filter(pk= instance.pk).values_list(
+            'module__course_id', 'is_published', 'module_id', 'order').first()
+        if row:
+            instance._previous_course_id = row[0]
+            instance._previous_progress_course_id = row[0] if row[1] else None
+            instance._previous_position = row[1:]
+
+
+@receiver(pre_save, sender= Lesson)
+def assign_lesson_bit(sender, instance, **kwargs):
+    # A new lesson, or one moved to another course, takes the next free bit of its course.
+    course_id = Module.objects.filter(pk= instance.module_id).values_list('course_id', flat= True).first()
+    previous_course_id = getattr(instance, '_previous_course_id', None)
+    instance._moved_course = previous_course_id is not None and previous_course_id != course_id
+    if course_id and (instance.bit_index is None or instance._moved_course):
+        instance.bit_index = allocate_lesson_bit(course_id)
+
+
+@receiver(post_save, sender= Lesson)
+def copy_bits_of_moved_lesson(sender, instance, **kwargs):
+    if getattr(instance, '_moved_course', False):
+        completed_by = UserLessonCompletion.objects.filter(lesson= instance, is_completed= True).values('student_id')
+        bits_from_rows(Enroll.objects.filter(course__modules= instance.module_id, student_id__in= completed_by))
+
+
+@receiver(post_save, sender= Lesson)
+def count_lesson_on_save(sender, instance, **kwargs):
+    # Publish, unpublish, or a published lesson moved to another course's module.
+    previous_course_id = getattr(instance, '_previous_progress_course_id', None)
+    current_course_id = Module.objects.filter(pk= instance.module_id).values_list('course_id', flat= True).first()
+    course_id = current_course_id if instance.is_published else None
+
+    if previous_course_id != course_id:
+        if previous_course_id:
+            shift_course_lessons(instance.pk, previous_course_id, -1)
+        if course_id:
+            shift_course_lessons(instance.pk, course_id, 1)
+
+    # Only the publish flag, order or module move the resume point, a title or content edit leaves it.
+    if getattr(instance, '_previous_position', None) != (instance.is_published, instance.module_id, instance.order):
+        course_ids = {current_course_id, getattr(instance, '_previous_course_id', None)} - {None}
+        refresh_next_lessons(Enroll.objects.filter(course_id__in= course_ids))
+
+
+@receiver(pre_delete, sender= Lesson)
+def count_lesson_on_delete(sender, instance, origin= None, **kwargs):
+    # Runs before the completions cascade, so the students who completed it can still be found.
+    if _deleted_through(origin, Course):
+        return
+    course_id = _published_course_id(instance.pk)
+    if course_id:
+        shift_course_lessons(instance.pk, course_id, -1)
+
+
+@receiver(post_delete, sender= Lesson)
+def point_past_deleted_lesson(sender, instance, origin= None, **kwargs):
+    # SET_NULL cleared the pointers at this lesson, the module row still exists at this point. Lessons
+    # cascading from a module are re-pointed once, by point_past_deleted_module.
+    if _deleted_through(origin, Course) or _deleted_through(origin, Module):
+        return
+    course_id = Module.objects.filter(pk= instance.module_id).values_list('course_id', flat= True).first()
+    if course_id:
+        refresh_next_lessons(Enroll.objects.filter(course_id= course_id))
+
+
+@receiver(pre_save, sender= Module)
+def remember_module_position(sender, instance, **kwargs):
+    instance._previous_position = None
+    if instance.pk:
+        instance._previous_position = Module.objects.filter(pk= instance.pk).values_list('course_id', 'order').first()
+
+
+@receiver(post_save, sender= Module)
+def point_after_module_change(sender, instance, created, **kwargs):
+    # A new module has no lessons yet. Only a reorder or a move to another course changes the reading
+    # order, a title or description edit leaves it.
+    previous = getattr(instance, '_previous_position', None)
+    if not created and previous != (instance.course_id, instance.order):
+        course_ids = {instance.course_id, previous[0] if previous else None} - {None}
+        refresh_next_lessons(Enroll.objects.filter(course_id__in= course_ids))
+
+
+@receiver(post_delete, sender= Module)
+def point_past_deleted_module(sender, instance, origin= None, **kwargs):
+    # Once for all the lessons that cascaded with it.
+    if not _deleted_through(origin, Course):
+        refresh_next_lessons(Enroll.objects.filter(course_id= instance.course_id))
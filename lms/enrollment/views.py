@@ -5,6 +5,7 @@ from django.db import IntegrityError
 
 from courses.models import Course
 from .models import Enroll
+from .services import is_enrolled_in
 from users.services import notify_new_enrollment
 
 # Create your views here.
@@ -22,7 +23,7 @@ def enroll_course(request, course_slug):
         return redirect('courses:course_details', course_slug= course_slug)
     
     if request.method == 'POST':
-        if Enroll.objects.filter(student= request.user, course= course).exists():
+        if is_enrolled_in(request.user, course):
             messages.info(request, "You already enrolled in this course.")
             return redirect('courses:course_details', course_slug= course_slug)
         
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
     'courses',
     'discussion',
@@ -147,6 +148,16 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/image/'
 MEDIA_ROOT = BASE_DIR / "static/image/"
 
+# Rendered certificate PDFs (courses/certificates.py), outside MEDIA_ROOT so they are not publicly served.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'certificates': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': BASE_DIR / 'certificates'},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -177,12 +188,51 @@ TINYMCE_DEFAULT_CONFIG = {
     'custom_undo_redo_levels': 10,
 }
 
+# CACHE
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/1',
+    }
+}
+
 # CELERY SETTINGS
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 
+# Certificate PDFs render on their own queue, so a burst of graduates never delays other tasks.
+# Its worker is the 'certificates' process of the Procfile (celery_certificates in docker-compose.yml),
+# one process per core by default.
+CELERY_TASK_ROUTES = {
+    'courses.tasks.task_render_certificate': {'queue': 'certificates'},
+}
+
+# Periodic tasks (run with: celery -A lms beat -l info)
+CELERY_BEAT_SCHEDULE = {
+    'reconcile-site-stats': {
+        'task': 'core.tasks.task_reconcile_site_stats',
+        'schedule': 60 * 60,
+    },
+    'flush-lesson-views': {
+        'task': 'courses.tasks.task_flush_lesson_views',
+        'schedule': 30,
+    },
+    'expire-quiz-attempts': {
+        'task': 'quiz.tasks.task_expire_attempts',
+        'schedule': 60,
+    },
+    'analyze-quiz-items': {
+        'task': 'quiz.tasks.task_analyze_quiz_items',
+        'schedule': 60 * 60,
+    },
+}
+
+# Lesson views are buffered here and flushed in bulk by the beat task above (courses/tracking.py).
+# None keeps the buffer in process, for development only.
+LESSON_VIEW_BUFFER_URL = 'redis://localhost:6379/2'
+
 # REST FRAMEWORK JWT
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSESS': ('rest_framework_simplejwt.authentication.JWTAuthentication',),
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from quiz.models import Quiz, Question, Answer, QuizAttempt, UserAnswer
+from django.db.models import OuterRef, Subquery
+
+from quiz.models import Quiz, Question, Answer, QuizAttempt, UserAnswer, score_attempts
 
 # Register your models here.
 
@@ -47,9 +49,16 @@ class AnswerAdmin(admin.ModelAdmin):
 
 @admin.action(description= "Regrade selected attempts")
 def regrade_selected_attempts(modeladmin, request, queryset):
-    for attempt in queryset:
-        attempt.recalculate_and_save()
-    modeladmin.message_user(request, f"{queryset.count()} attempts have been successfully regraded.")
+    # Against the current answer key and marks: the attempts move to the quiz's current snapshot, then one
+    # UPDATE per quiz scores them. In progress attempts keep the questions they were started with.
+    completed = queryset.filter(is_completed= True)
+    skipped = queryset.count() - completed.count()
+    completed.update(snapshot_version= Subquery(Quiz.objects.filter(pk= OuterRef('quiz_id')).values('snapshot_version')))
+    regraded = score_attempts(completed)
+    message = f"{regraded} attempts have been successfully regraded."
+    if skipped:
+        message += f" {skipped} in progress attempts were skipped."
+    modeladmin.message_user(request, message)
 
 @admin.register(QuizAttempt)
 class QuizAttemptAdmin(admin.ModelAdmin):
@@ -0,0 +1,93 @@
+import numpy as np
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Question, QuestionStats, QuizAttempt, UserAnswer, correct_answers, recount_item_stats
+
+
+# Item analytics read by the instructors' quiz_analytics page. Difficulty and the answer choice distribution
+# are plain counters, kept current as attempts complete (quiz.models.record_item_stats). The discrimination
+# index needs every attempt's total score, so it is recomputed here in one pass per quiz, by the periodic
+# quiz.tasks.task_analyze_quiz_items, and only for the quizzes answered or whose answer key changed since
+# their last analysis. Questions whose key changed also get their counters recounted, the only full count
+# of their answers, so an answer key correction reaches difficulty too.
+
+# Share of the attempts in each of the upper and lower groups (Kelley's 27%).
+DISCRIMINATION_GROUP = 0.27
+# Below this the two groups are too small for the index to mean anything, it stays empty.
+DISCRIMINATION_MIN_ATTEMPTS = 20
+# The most recent attempts only, which bounds the matrix of a very popular quiz.
+DISCRIMINATION_MAX_ATTEMPTS = 50000
+
+
+def _key_changed():
+    """ Q of the QuestionStats whose answer key changed since their last analysis. """
+    return Q(key_changed_at__isnull= False) & (Q(analyzed_at__isnull= True) | Q(key_changed_at__gt= F('analyzed_at')))
+
+
+def quizzes_to_analyze():
+    """ Ids of the quizzes with answers counted, or an answer key edited, since their last analysis. """
+    stale = Q(analyzed_at__isnull= True, responses__gt= 0) | Q(updated_at__gt= F('analyzed_at')) | _key_changed()
+    return QuestionStats.objects.filter(stale).values_list('question__quiz_id', flat= True).distinct()
+
+
+def item_matrix(quiz_id, question_ids):
+    """ (correct, scores): a 0/1 matrix of the completed attempts by question_ids, 1 where the answer earned
+        the question's marks, and each attempt's score. Two queries, no model instances. """
+    attempts = list(QuizAttempt.objects.filter(quiz_id= quiz_id, is_completed= True).order_by(
+        '-completed_at').values_list('id', 'score')[:DISCRIMINATION_MAX_ATTEMPTS])
+    if not attempts:
+        return np.zeros((0, len(question_ids)), dtype= np.int8), np.zeros(0)
+
+    attempt_ids, scores = zip(*attempts)
+    rows = {attempt_id: row for row, attempt_id in enumerate(attempt_ids)}
+    columns = {question_id: column for column, question_id in enumerate(question_ids)}
+
+    correct = np.zeros((len(attempt_ids), len(question_ids)), dtype= np.int8)
+    pairs = np.array(list(UserAnswer.objects.filter(
+        correct_answers(), attempt_id__in= attempt_ids, question_id__in= question_ids,
+    ).values_list('attempt_id', 'question_id')), dtype= np.int64).reshape(-1, 2)
+    if len(pairs):
+        correct[[rows[a] for a in pairs[:, 0]], [columns[q] for q in pairs[:, 1]]] = 1
+    return correct, np.asarray(scores, dtype= np.float64)
+
+
+def discrimination_indexes(correct, scores, group= DISCRIMINATION_GROUP):
+    """ Per column of correct, the proportion correct of the top scoring group of attempts minus that of the
+        bottom one. From -1 to 1, higher means the question separates strong and weak students better. """
+    size = max(1, int(round(len(scores) * group)))
+    order = np.argsort(scores, kind= 'stable')
+    lower, upper = correct[order[:size]], correct[order[-size:]]
+    return upper.mean(axis= 0) - lower.mean(axis= 0)
+
+
+def analyze_quiz(quiz_id):
+    """ Recomputes the discrimination index of every question of the quiz, and recounts the counters of
+        those whose answer key changed since the last analysis. """
+    # Taken before reading, answers counted meanwhile leave the quiz stale for the next run.
+    started = timezone.now()
+    key_changed_ids = list(QuestionStats.objects.filter(_key_changed(), question__quiz_id= quiz_id).values_list(
+        'question_id', flat= True))
+    if key_changed_ids:
+        recount_item_stats(Question.objects.filter(id__in= key_changed_ids))
+    stats = list(QuestionStats.objects.filter(question__quiz_id= quiz_id).order_by('question_id'))
+    if not stats:
+        return 0
+
+    correct, scores = item_matrix(quiz_id, [item.question_id for item in stats])
+    indexes = discrimination_indexes(correct, scores) if len(scores) >= DISCRIMINATION_MIN_ATTEMPTS else None
+    for column, item in enumerate(stats):
+        item.discrimination = round(float(indexes[column]), 4) if indexes is not None else None
+        item.discrimination_sample = len(scores)
+        item.analyzed_at = started
+
+    QuestionStats.objects.bulk_update(stats, ['discrimination', 'discrimination_sample', 'analyzed_at'])
+    return len(stats)
+
+
+def analyze_quizzes():
+    """ Analyzes every stale quiz, returns how many. """
+    quiz_ids = list(quizzes_to_analyze())
+    for quiz_id in quiz_ids:
+        analyze_quiz(quiz_id)
+    return len(quiz_ids)
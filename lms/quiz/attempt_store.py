@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import QuizAttempt, UserAnswer
+from .snapshot import existing_rows, get_attempt_snapshot
+
+
+# Cache-resident attempts (Quiz.cache_answers): while the attempt is in progress quiz_take only writes each
+# answer to the cache, one key per (attempt, question) so concurrent requests never overwrite each other's.
+# When the attempt completes, or is swept as abandoned, all of them are written with one bulk upsert.
+#
+# The keys are deleted only after that transaction commits. A request or worker dying half way leaves the
+# answers in the cache and the attempt incomplete, and the upsert is idempotent, so the next completion or
+# expiry sweep (quiz.expiry.expire_attempts) simply writes them again.
+
+ATTEMPT_ANSWER_KEY = 'quiz:attempt_answer:{attempt_id}:{question_id}'
+# Well past quiz.expiry.ABANDONED_ATTEMPT_AGE, so the sweep always runs before an answer expires.
+ATTEMPT_ANSWER_TIMEOUT = 60 * 60 * 24 * 2
+
+
+def attempt_answer_key(attempt_id, question_id):
+    return ATTEMPT_ANSWER_KEY.format(attempt_id= attempt_id, question_id= question_id)
+
+
+def store_answer(attempt_id, question_id, selected_answer_id= None, short_answer_text= None):
+    """ No database access. """
+    cache.set(attempt_answer_key(attempt_id, question_id), [selected_answer_id, short_answer_text],
+              timeout= ATTEMPT_ANSWER_TIMEOUT)
+
+
+def _answer_keys(attempt):
+    return {
+        attempt_answer_key(attempt.id, question['id']): question['id']
+        for question in get_attempt_snapshot(attempt).questions
+    }
+
+
+def forget_cached_answers(attempt):
+    cache.delete_many(list(_answer_keys(attempt)))
+
+
+def persist_cached_answers(attempts):
+    """ Upserts the cached answers of the attempts in one statement, inside the caller's transaction.
+        Returns how many were written. """
+    keys = {}
+    for attempt in attempts:
+        keys.update({key: (attempt, question_id) for key, question_id in _answer_keys(attempt).items()})
+    if not keys:
+        return 0
+    cached = cache.get_many(list(keys))
+
+    # A row deleted since the answer was given would fail the whole statement, and with it every later
+    # completion or expiry sweep of the attempt: a deleted question is dropped, a deleted choice is stored
+    # as no answer.
+    questions, answers = existing_rows(
+        {keys[key][1] for key in cached},
+        {selected_answer_id for selected_answer_id, _ in cached.values() if selected_answer_id})
+
+    user_answers = [
+        UserAnswer(attempt= keys[key][0], question_id= keys[key][1], short_answer_text= short_answer_text,
+                   selected_answer_id= selected_answer_id if selected_answer_id in answers else None)
+        for key, (selected_answer_id, short_answer_text) in cached.items()
+        if keys[key][1] in questions
+    ]
+    UserAnswer.objects.bulk_create(
+        user_answers, update_conflicts= True, unique_fields= ['attempt', 'question'],
+        update_fields= ['selected_answer', 'short_answer_text'],
+    )
+    transaction.on_commit(lambda: cache.delete_many(list(cached)))
+    return len(user_answers)
+
+
+def complete_cached_attempt(attempt_id):
+    """ Writes the cached answers and completes the attempt, in one transaction. Returns the attempt, or None
+        when it was already completed (eg. by a concurrent sweep). """
+    with transaction.atomic():
+        attempt = QuizAttempt.objects.select_for_update().select_related('quiz').filter(
+            pk= attempt_id, is_completed= False).first()
+        if attempt is None:
+            return None
+        persist_cached_answers([attempt])
+        attempt.complete_attempts()
+    return attempt
+
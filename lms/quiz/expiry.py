@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import DateTimeField, ExpressionWrapper, F, Q, Value
+from django.utils import timezone
+
+from .attempt_store import complete_cached_attempt, persist_cached_answers
+from .models import QuizAttempt, record_item_stats, score_attempts
+
+
+# Server side time limit of Quiz.duration_minutes. quiz_take and quiz_take_all refuse answers once it is
+# up, and quiz.tasks.task_expire_attempts completes every attempt past its deadline in batches, so that
+# no attempt stays in progress forever. Attempts of untimed quizzes count as abandoned after a day.
+
+# Allowance for the request that was sent just before the deadline.
+ATTEMPT_GRACE = timedelta(seconds= 30)
+ABANDONED_ATTEMPT_AGE = timedelta(days= 1)
+EXPIRY_BATCH_SIZE = 500
+
+
+def attempt_deadline(attempt):
+    """ When the attempt's time is up, None for quizzes without a time limit. """
+    if not attempt.quiz.duration_minutes:
+        return None
+    return attempt.started_at + timedelta(minutes= attempt.quiz.duration_minutes)
+
+
+def is_past_deadline(attempt, grace= ATTEMPT_GRACE):
+    deadline = attempt_deadline(attempt)
+    return deadline is not None and timezone.now() >= deadline + grace
+
+
+def seconds_left(attempt):
+    """ Whole seconds until the deadline by the server clock (0 once it passed), None without a time limit.
+        The quiz timer counts down from it, never from the browser clock. """
+    deadline = attempt_deadline(attempt)
+    if deadline is None:
+        return None
+    return max(0, int((deadline - timezone.now()).total_seconds()))
+
+
+def finish_attempt(attempt):
+    """ Completes and scores the attempt, writing its answers first when they are in the cache. """
+    if attempt.answers_in_cache:
+        complete_cached_attempt(attempt.id)
+    else:
+        attempt.complete_attempts()
+
+
+def expired_attempts(now):
+    """ In progress attempts past their deadline (plus the grace) or abandoned. The started_at bound comes
+        first so the (is_completed, started_at) index narrows the scan. """
+    deadline = ExpressionWrapper(
+        F('started_at') + F('quiz__duration_minutes') * Value(timedelta(minutes= 1)), output_field= DateTimeField())
+    timed = Q(quiz__duration_minutes__gt= 0, deadline__lte= now - ATTEMPT_GRACE)
+    untimed = (Q(quiz__duration_minutes__isnull= True) | Q(quiz__duration_minutes= 0)) & Q(
+        started_at__lt= now - ABANDONED_ATTEMPT_AGE)
+
+    return QuizAttempt.objects.filter(is_completed= False, started_at__lt= now - ATTEMPT_GRACE).annotate(
+        deadline= deadline).filter(timed | untimed)
+
+
+def expire_attempts(batch_size= EXPIRY_BATCH_SIZE):
+    """ Completes and scores the expired attempts, a batch per transaction: one upsert of the cached answers,
+        one UPDATE to complete, one to score (score_attempts) and two for the item analytics counters
+        (record_item_stats), never a save() per attempt.
+        Returns how many attempts were completed. """
+    now = timezone.now()
+    expired = 0
+    while True:
+        with transaction.atomic():
+            # Attempts a request is completing right now are left to it.
+            batch = list(expired_attempts(now).select_related('quiz').select_for_update(
+                skip_locked= True, of= ('self',)).order_by('started_at')[:batch_size])
+            if not batch:
+                break
+
+            persist_cached_answers([attempt for attempt in batch if attempt.answers_in_cache])
+            attempts = QuizAttempt.objects.filter(pk__in= [attempt.pk for attempt in batch])
+            # Completed first, score_attempts only passes completed attempts.
+            attempts.update(is_completed= True, completed_at= now)
+            score_attempts(attempts)
+            record_item_stats(attempts)
+
+        expired += len(batch)
+        if len(batch) < batch_size:
+            break
+    return expired
@@ -8,13 +8,14 @@ from tinymce.widgets import TinyMCE
 class QuizForm(forms.ModelForm):
     class Meta:
         model = Quiz
-        fields = ['title', 'description', 'duration_minutes', 'pass_percentage', 'is_published']
+        fields = ['title', 'description', 'duration_minutes', 'pass_percentage', 'is_published', 'cache_answers']
         labels = {
             'title': 'Quiz Title',
             'description': 'Description',
             'duration_minutes': 'Time Limit (in minutes)',
             'pass_percentage': 'Passing Score (%)',
             'is_piblished': 'Make the quiz available to students',
+            'cache_answers': 'Exam mode',
         }
         widgets= {
         'description': TinyMCE(),
@@ -67,22 +68,18 @@ class AnswerForm(forms.ModelForm):
         return cleaned_data
 
 
-class AnswerChoiceField(forms.ModelChoiceField):
-    def label_from_instance(self, obj) -> str:
-        return obj.text
-
-
 class UserAnswerForm(forms.Form):
-    answer = AnswerChoiceField(
-        queryset= Answer.objects.none(),
+    answer = forms.TypedChoiceField(
+        choices= (),
+        coerce= int,
         widget= forms.RadioSelect,
-        empty_label= None,
         required= True,
     )
     def __init__(self, *args, question= None, **kwargs):
         super().__init__(*args, **kwargs)
         if question:
-            self.fields['answer'].queryset = question.answers.all()
+            # A quiz.snapshot question, the choices come from the snapshot without a query.
+            self.fields['answer'].choices = [(answer['id'], answer['text']) for answer in question['answers']]
 
 
 class ShortAnswerForm(forms.Form):
@@ -0,0 +1,92 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from courses.models import Course, Module, Lesson
+from quiz.attempt_store import complete_cached_attempt, forget_cached_answers, store_answer
+from quiz.models import Quiz, Question, Answer, QuizAttempt, UserAnswer
+from quiz.snapshot import get_quiz_snapshot
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Simulates a timed exam, every student answering every question, with per-answer database writes "\
+           "against cache-resident attempts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type= int, default= 1000, help= "Students sitting the exam.")
+        parser.add_argument('--questions', type= int, default= 20, help= "Questions of the quiz.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            quiz = self.seed_quiz(options['questions'])
+            students = self.seed_students(options['students'])
+            snapshot = get_quiz_snapshot(quiz)
+            answers = [(question['id'], question['answers'][0]['id']) for question in snapshot.questions]
+            total = len(students) * len(answers)
+
+            for label, cached in (('database', False), ('cache', True)):
+                attempts = QuizAttempt.objects.bulk_create([
+                    QuizAttempt(student= student, quiz= quiz, snapshot_version= snapshot.version,
+                                answers_in_cache= cached)
+                    for student in students
+                ])
+                statements = []
+                start = time.perf_counter()
+                with connection.execute_wrapper(lambda execute, sql, *rest: statements.append(sql) or execute(sql, *rest)):
+                    for attempt in attempts:
+                        attempt.quiz = quiz
+                        # What quiz_take does for each answer, then on the last question.
+                        for question_id, answer_id in answers:
+                            if cached:
+                                store_answer(attempt.id, question_id, selected_answer_id= answer_id)
+                            else:
+                                UserAnswer.objects.update_or_create(
+                                    attempt= attempt, question_id= question_id,
+                                    defaults= {'selected_answer_id': answer_id})
+                        if cached:
+                            complete_cached_attempt(attempt.id)
+                        else:
+                            attempt.complete_attempts()
+                elapsed = time.perf_counter() - start
+
+                self.stdout.write(
+                    f"{label:>8} : {total} answers in {elapsed:.2f} s ({total / elapsed:,.0f} answers/s), "
+                    f"{len(statements) / total:.2f} statements per answer"
+                )
+                if cached:
+                    for attempt in attempts:
+                        forget_cached_answers(attempt)
+
+            # Never keep the synthetic rows.
+            transaction.set_rollback(True)
+
+    def seed_quiz(self, questions):
+        instructor = User.objects.create(username= 'benchmark-instructor', email= 'benchmark-instructor@example.com',
+                                         is_instructor= True, password= make_password(None))
+        course = Course.objects.create(title= 'Benchmark', slug= 'benchmark-exam', instructor= instructor,
+                                       is_published= True)
+        module = Module.objects.create(course= course, title= 'Benchmark', order= 1)
+        lesson = Lesson.objects.create(module= module, title= 'Benchmark', order= 1, is_published= True)
+        quiz = Quiz.objects.create(lesson= lesson, title= 'Benchmark', is_published= True)
+
+        created = Question.objects.bulk_create([
+            Question(quiz= quiz, text= f'Question {i}', order= i + 1) for i in range(questions)
+        ])
+        Answer.objects.bulk_create([
+            Answer(question= question, text= f'Choice {i}', is_correct= i == 0)
+            for question in created for i in range(4)
+        ])
+        return quiz
+
+    def seed_students(self, count):
+        password = make_password(None)
+        return User.objects.bulk_create([
+            User(username= f'benchmark-{i}', email= f'benchmark-{i}@example.com', is_student= True, password= password)
+            for i in range(count)
+        ], batch_size= 5000)
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0003_alter_answer_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='snapshot_version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='snapshot_version',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='QuizSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('data', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='quiz.quiz')),
+            ],
+            options={
+                'unique_together': {('quiz', 'version')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0004_quiz_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='cache_answers',
+            field=models.BooleanField(default=False, help_text='Keep in-progress answers in the cache, written once when the attempt completes (large timed exams).'),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='answers_in_cache',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
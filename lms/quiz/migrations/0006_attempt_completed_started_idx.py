@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0005_cached_attempt_answers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['is_completed', 'started_at'], name='attempt_completed_started_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:07
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_item_stats(apps, schema_editor):
+    Question = apps.get_model('quiz', 'Question')
+    Answer = apps.get_model('quiz', 'Answer')
+    QuestionStats = apps.get_model('quiz', 'QuestionStats')
+    AnswerStats = apps.get_model('quiz', 'AnswerStats')
+
+    completed = Q(user_responses__attempt__is_completed=True)
+    correct = completed & (
+        Q(question_type__in=('mcq', 'true_false'), user_responses__selected_answer__is_correct=True)
+        | Q(question_type='short_answers', user_responses__is_correct_manual=True)
+    )
+    QuestionStats.objects.bulk_create([
+        QuestionStats(question_id=row['id'], responses=row['responses'], correct=row['correct'])
+        for row in Question.objects.values('id').annotate(
+            responses=Count('user_responses', filter=completed), correct=Count('user_responses', filter=correct))
+    ], batch_size=1000)
+    AnswerStats.objects.bulk_create([
+        AnswerStats(answer_id=row['id'], selections=row['selections'])
+        for row in Answer.objects.values('id').annotate(
+            selections=Count('user_selections', filter=Q(user_selections__attempt__is_completed=True)))
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0006_attempt_completed_started_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerStats',
+            fields=[
+                ('answer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='quiz.answer')),
+                ('selections', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Answer stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='quiz.question')),
+                ('responses', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('discrimination', models.FloatField(blank=True, null=True)),
+                ('discrimination_sample', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('analyzed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Question stats',
+            },
+        ),
+        migrations.RunPython(backfill_item_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0007_item_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionstats',
+            name='key_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
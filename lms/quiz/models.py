@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThan, GreaterThanOrEqual
 from django.conf import settings
 from courses.models import Lesson
 from django.core.exceptions import ValidationError
@@ -15,13 +18,29 @@ class Quiz(models.Model):
     duration_minutes = models.PositiveIntegerField(blank= True, null =True, help_text= "optional: time limit")
     pass_percentage = models.PositiveIntegerField(default= 0, help_text= "minimum percent")
     is_published= models.BooleanField(default= False)
+    cache_answers = models.BooleanField(default= False, help_text= "Keep in-progress answers in the cache, "
+                                        "written once when the attempt completes (large timed exams).")
     created_at = models.DateTimeField(auto_now_add= True)
     updated_at = models.DateTimeField(auto_now_add= True)
 
+    # Bumped by quiz.signals whenever a question or answer changes, keys the compiled snapshot (quiz/snapshot.py).
+    snapshot_version = models.PositiveIntegerField(default= 1, editable= False)
+
+    # Maintained with atomic UPDATEs only, a full save of a stale instance must not write them back.
+    DENORMALIZED_FIELDS = ('snapshot_version',)
+
     class Meta:
         verbose_name_plural = "Quizzes"
         ordering = ['-created_at']
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.DENORMALIZED_FIELDS
+            ]
+        return super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.title} (Lesson : {self.lesson.title})"
     
@@ -71,30 +90,28 @@ class QuizAttempt(models.Model):
     completed_at = models.DateTimeField(blank= True, null= True)
     is_completed = models.BooleanField(default= False)
     passed = models.BooleanField(default= False)
+    # Quiz snapshot the attempt is delivered from, edits made while it is in progress don't reach it.
+    snapshot_version = models.PositiveIntegerField(null= True, blank= True, editable= False)
+    # Copied from Quiz.cache_answers at the start, answers live in the cache until completion (quiz/attempt_store.py).
+    answers_in_cache = models.BooleanField(default= False, editable= False)
 
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            # The expiry sweep (quiz/expiry.py) scans in progress attempts by age.
+            models.Index(fields= ['is_completed', 'started_at'], name= 'attempt_completed_started_idx'),
+        ]
 
     def __str__(self):
         status = "completed" if self.is_completed else "In progress"
         return f"{self.student.username}'s attempt on {self.quiz.title} ({status})"
     
     def calculate_score(self):
-        score = 0
-        self.total_marks = self.quiz.get_total_marks() or 0
-
-        # Query all answers for this attempt.
-        answers = self.user_answers.all().select_related('question')
-
-        for user_answer in answers:
-            if user_answer.question.question_type in ['mcq', 'true_false']:
-                if user_answer.selected_answer and user_answer.selected_answer.is_correct:
-                    score += user_answer.question.marks
-            elif user_answer.question.question_type == 'short_answers':
-                if user_answer.is_correct_manual:
-                    score += user_answer.question.marks
-
-        self.score= score
+        """ Score and total marks against the attempt's pinned snapshot, see attempt_scores(). """
+        from .snapshot import get_attempt_snapshot
+        self.score, self.total_marks = attempt_scores(
+            QuizAttempt.objects.filter(pk= self.pk), get_attempt_snapshot(self)).values_list(
+            'computed_score', 'computed_total').get()
 
 
     def evaluate_pass_status(self):
@@ -109,7 +126,11 @@ class QuizAttempt(models.Model):
         self.completed_at= timezone.now()
         self.calculate_score()
         self.evaluate_pass_status()
+        # Only the call that moves the row to completed adds it to the item analytics counters.
+        first_completion = QuizAttempt.objects.filter(pk= self.pk, is_completed= False).update(is_completed= True)
         self.save()
+        if first_completion:
+            record_item_stats(QuizAttempt.objects.filter(pk= self.pk))
 
     def recalculate_and_save(self): 
         """Recalculate score and pass status, then saves the attempt."""
@@ -118,6 +139,59 @@ class QuizAttempt(models.Model):
         self.save()   
 
 
+class QuizSnapshot(models.Model):
+    """ One compiled, never modified version of a quiz: questions, choices, answer key and marks. """
+    quiz = models.ForeignKey(Quiz, on_delete= models.CASCADE, related_name= 'snapshots')
+    version = models.PositiveIntegerField()
+    data = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add= True)
+
+    class Meta:
+        unique_together = ('quiz', 'version')
+
+    def __str__(self):
+        return f"{self.quiz_id} v{self.version}"
+
+
+class QuestionStats(models.Model):
+    """ Item analytics of a question. The counters grow as attempts complete (record_item_stats),
+        discrimination is recomputed by the periodic job of quiz/analytics.py. """
+    question = models.OneToOneField(Question, on_delete= models.CASCADE, primary_key= True, related_name= 'stats')
+    # Completed attempts that answered the question, and how many of those earned its marks.
+    responses = models.PositiveIntegerField(default= 0)
+    correct = models.PositiveIntegerField(default= 0)
+    # Upper minus lower 27% proportion correct, over discrimination_sample completed attempts.
+    discrimination = models.FloatField(null= True, blank= True)
+    discrimination_sample = models.PositiveIntegerField(default= 0)
+    updated_at = models.DateTimeField(default= timezone.now)
+    # Last edit of the question's choices, the next analysis recounts the counters under the new key.
+    key_changed_at = models.DateTimeField(null= True, blank= True)
+    analyzed_at = models.DateTimeField(null= True, blank= True)
+
+    class Meta:
+        verbose_name_plural = "Question stats"
+
+    def __str__(self):
+        return f"Stats of question {self.question_id}"
+
+    @property
+    def difficulty(self):
+        """ Percent correct, None before anyone answered. """
+        return self.correct * 100 / self.responses if self.responses else None
+
+
+class AnswerStats(models.Model):
+    """ How often an answer choice was picked in completed attempts. """
+    answer = models.OneToOneField(Answer, on_delete= models.CASCADE, primary_key= True, related_name= 'stats')
+    selections = models.PositiveIntegerField(default= 0)
+
+    class Meta:
+        verbose_name_plural = "Answer stats"
+
+    def __str__(self):
+        return f"Stats of answer {self.answer_id}"
+
+
 class UserAnswer(models.Model):
     attempt = models.ForeignKey(QuizAttempt, on_delete= models.CASCADE, related_name= 'user_answers')
     question = models.ForeignKey(Question, on_delete= models.CASCADE, related_name= 'user_responses')
@@ -135,4 +209,114 @@ class UserAnswer(models.Model):
             return f"{self.attempt.student.username}'s answer to {self.question.id}: {self.selected_answer.text}"
         elif self.question.question_type == 'short_answer' and self.short_answer_text:
             return f"{self.attempt.student.username}'s short answer to {self.question.id}: {self.short_answer_text[:50]}."
-        return f"{self.attempt.student.username}'s answer to {self.question.id}"
\ No newline at end of file
+        return f"{self.attempt.student.username}'s answer to {self.question.id}"
+
+
+# ------------- SCORING ------------------------------------------------.
+
+CHOICE_QUESTION_TYPES = ('mcq', 'true_false')
+
+
+# Attempts are scored with the answer key and marks of the snapshot they are pinned to (quiz/snapshot.py),
+# an edit made after an attempt started never changes its score. Answer key corrections reach attempts
+# already taken through the admin regrade, which moves them to the current snapshot first.
+
+def correct_answers():
+    """ Q of the UserAnswer rows that earn their question's marks under the live answer key, for the
+        item analytics (attempts are scored from their snapshot). """
+    return (Q(question__question_type__in= CHOICE_QUESTION_TYPES, selected_answer__is_correct= True)
+            | Q(question__question_type= 'short_answers', is_correct_manual= True))
+
+
+def _score_expressions(snapshot):
+    """ Score and total marks of an attempt of the snapshot's version. A question deleted since is left out
+        of the total, an answer to it could not be kept. """
+    earned = [
+        When(Q(question_id= question['id'], selected_answer_id__in= question['correct_answer_ids'])
+             if question['question_type'] in CHOICE_QUESTION_TYPES
+             else Q(question_id= question['id'], is_correct_manual= True), then= Value(question['marks']))
+        for question in snapshot.questions
+        if question['correct_answer_ids'] or question['question_type'] not in CHOICE_QUESTION_TYPES
+    ]
+    score = UserAnswer.objects.filter(attempt= OuterRef('pk')).values('attempt').annotate(
+        score= Sum(Case(*earned, default= Value(0)))).values('score')
+
+    marks = {question['id']: question['marks'] for question in snapshot.questions}
+    total = sum(marks[question_id] for question_id in Question.objects.filter(id__in= marks).values_list('id', flat= True))
+    return Coalesce(Subquery(score), 0), Value(total)
+
+
+def _snapshot_groups(attempts):
+    """ (snapshot, attempts) for each quiz snapshot version the attempts are pinned to. """
+    from .snapshot import get_quiz_snapshot
+    versions = attempts.order_by().values_list('quiz_id', 'snapshot_version').distinct()
+    quizzes = Quiz.objects.in_bulk({quiz_id for quiz_id, _ in versions})
+    for quiz_id, version in versions:
+        group = QuizAttempt.objects.filter(pk__in= attempts.values('pk'), quiz_id= quiz_id, snapshot_version= version)
+        yield get_quiz_snapshot(quizzes[quiz_id], version), group
+
+
+def attempt_scores(attempts, snapshot):
+    """ The attempts, all of the snapshot's version, annotated with computed_score and computed_total,
+        no rows loaded per answer. """
+    score, total = _score_expressions(snapshot)
+    return attempts.annotate(computed_score= score, computed_total= total)
+
+
+def score_attempts(attempts):
+    """ Rescores every attempt of the queryset and sets passed, one UPDATE per quiz snapshot version among
+        them. Same result as recalculate_and_save() on each. Returns how many attempts were updated. """
+    pass_percentage = Subquery(Quiz.objects.filter(pk= OuterRef('quiz_id')).values('pass_percentage'))
+    updated = 0
+    for snapshot, group in _snapshot_groups(attempts):
+        score, total = _score_expressions(snapshot)
+        # score / total * 100 >= pass_percentage, in integers.
+        passed = Q(is_completed= True) & Q(GreaterThan(total, 0)) & Q(GreaterThanOrEqual(score * 100, pass_percentage * total))
+        updated += group.update(
+            score= score, total_marks= total,
+            passed= Case(When(passed, then= Value(True)), default= Value(False)),
+        )
+    return updated
+
+
+# ------------- ITEM ANALYTICS COUNTERS ------------------------------------------------.
+
+def _count(answers, field):
+    """ Correlated COUNT of the answers, 0 when there are none. """
+    return Coalesce(Subquery(answers.values(field).annotate(n= Count('pk')).values('n')), 0)
+
+
+def record_item_stats(attempts):
+    """ Adds the answers of newly completed attempts to QuestionStats and AnswerStats, one UPDATE each
+        whatever the number of attempts. The rows themselves are created with their question/answer
+        (quiz.signals). """
+    answers = UserAnswer.objects.filter(attempt__in= attempts)
+    now = timezone.now()
+
+    QuestionStats.objects.filter(question_id__in= answers.values('question_id')).update(
+        responses= F('responses') + _count(answers.filter(question= OuterRef('question_id')), 'question'),
+        correct= F('correct') + _count(answers.filter(correct_answers(), question= OuterRef('question_id')), 'question'),
+        updated_at= now,
+    )
+    AnswerStats.objects.filter(answer_id__in= answers.values('selected_answer_id')).update(
+        selections= F('selections') + _count(answers.filter(selected_answer= OuterRef('answer_id')), 'selected_answer'),
+    )
+
+
+def recount_item_stats(questions):
+    """ Recounts the counters of the questions from every completed attempt under the live answer key, one
+        UPDATE per table. The increments of record_item_stats can't follow an answer key edit, this does, for
+        the questions whose key changed only. """
+    answers = UserAnswer.objects.filter(attempt__is_completed= True)
+    QuestionStats.objects.filter(question__in= questions).update(
+        responses= _count(answers.filter(question= OuterRef('question_id')), 'question'),
+        correct= _count(answers.filter(correct_answers(), question= OuterRef('question_id')), 'question'),
+    )
+    AnswerStats.objects.filter(answer__question__in= questions).update(
+        selections= _count(answers.filter(selected_answer= OuterRef('answer_id')), 'selected_answer'),
+    )
+
+
+def record_manual_grade(question_id):
+    """ A short answer of a completed attempt was marked correct after the fact. """
+    QuestionStats.objects.filter(question_id= question_id).update(correct= F('correct') + 1, updated_at= timezone.now())
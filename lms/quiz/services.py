@@ -0,0 +1,75 @@
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+
+from .models import QuizAttempt, UserAnswer, CHOICE_QUESTION_TYPES
+from .snapshot import existing_rows, get_attempt_snapshot
+from .attempt_store import forget_cached_answers
+
+
+def submit_attempt_answers(attempt_id, submitted, allow_missing= False):
+    """ Whole-quiz submission. submitted maps question id -> answer id (mcq, true_false) or answer text
+        (short answers), eg. read from the one page form of quiz_take_all. allow_missing accepts
+        unanswered questions, for a submission made when the time ran out.
+
+        Every answer is validated against the attempt's quiz snapshot, one upsert writes all the UserAnswer
+        rows and the attempt is completed in the same transaction. Returns {question id: error}, nothing is
+        written unless it is empty. """
+    with transaction.atomic():
+        # Locked, a double submit waits here and then finds the attempt completed.
+        attempt = QuizAttempt.objects.select_for_update().select_related('quiz').get(pk= attempt_id)
+        if attempt.is_completed:
+            raise PermissionDenied("This attempt was already submitted.")
+
+        errors = {}
+        user_answers = []
+        for question in get_attempt_snapshot(attempt).questions:
+            question_id = question['id']
+            value = submitted.get(question_id)
+            if (value is None or not str(value).strip()) and allow_missing:
+                continue
+            elif value is None or not str(value).strip():
+                errors[question_id] = "This question is required."
+            elif question['question_type'] in CHOICE_QUESTION_TYPES:
+                answer_id = int(value) if str(value).isdigit() else None
+                if answer_id not in {answer['id'] for answer in question['answers']}:
+                    errors[question_id] = "Select a valid choice."
+                else:
+                    user_answers.append(UserAnswer(attempt= attempt, question_id= question_id,
+                                                   selected_answer_id= answer_id))
+            else:
+                user_answers.append(UserAnswer(attempt= attempt, question_id= question_id, short_answer_text= value))
+
+        if errors:
+            return errors
+
+        # A question deleted since the snapshot was compiled is dropped, a deleted choice is stored as no answer.
+        questions, answers = existing_rows(
+            [answer.question_id for answer in user_answers],
+            [answer.selected_answer_id for answer in user_answers if answer.selected_answer_id])
+        user_answers = [answer for answer in user_answers if answer.question_id in questions]
+        for answer in user_answers:
+            if answer.selected_answer_id not in answers:
+                answer.selected_answer_id = None
+
+        # Answers already given one question at a time (quiz_take) are overwritten.
+        UserAnswer.objects.bulk_create(
+            user_answers, update_conflicts= True, unique_fields= ['attempt', 'question'],
+            update_fields= ['selected_answer', 'short_answer_text'],
+        )
+        attempt.complete_attempts()
+        if attempt.answers_in_cache:
+            # Everything was just written, answers cached by earlier one question pages are stale.
+            transaction.on_commit(lambda: forget_cached_answers(attempt))
+    return {}
+
+
+def save_answer(attempt, question_id, **answer):
+    """ quiz_take's write of one answer, selected_answer_id or short_answer_text. Nothing is written for a
+        question deleted since the attempt's snapshot was compiled, a deleted choice is stored as no answer. """
+    selected_answer_id = answer.get('selected_answer_id')
+    questions, answers = existing_rows([question_id], [selected_answer_id] if selected_answer_id else ())
+    if question_id not in questions:
+        return None
+    if selected_answer_id and selected_answer_id not in answers:
+        answer['selected_answer_id'] = None
+    return UserAnswer.objects.update_or_create(attempt= attempt, question_id= question_id, defaults= answer)[0]
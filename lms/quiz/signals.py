@@ -0,0 +1,42 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Answer, AnswerStats, Question, QuestionStats
+from .snapshot import bump_snapshot_version
+
+
+# ------------- QUIZ SNAPSHOT ------------------------------------------------.
+
+@receiver(post_save, sender= Question)
+@receiver(post_delete, sender= Question)
+def bump_snapshot_on_question_change(sender, instance, **kwargs):
+    bump_snapshot_version(quiz_id= instance.quiz_id)
+
+
+@receiver(post_save, sender= Answer)
+@receiver(post_delete, sender= Answer)
+def bump_snapshot_on_answer_change(sender, instance, **kwargs):
+    bump_snapshot_version(question_id= instance.question_id)
+
+
+# ------------- ITEM ANALYTICS ------------------------------------------------.
+
+@receiver(post_save, sender= Question)
+def create_question_stats(sender, instance, created, **kwargs):
+    """ record_item_stats only updates, every question gets its counters row up front. """
+    if created:
+        QuestionStats.objects.get_or_create(question= instance)
+
+
+@receiver(post_save, sender= Answer)
+def create_answer_stats(sender, instance, created, **kwargs):
+    if created:
+        AnswerStats.objects.get_or_create(answer= instance)
+
+
+@receiver(post_save, sender= Answer)
+@receiver(post_delete, sender= Answer)
+def mark_stats_stale_on_answer_change(sender, instance, **kwargs):
+    """ An answer key edit changes which responses were correct, the next analysis recounts the question. """
+    QuestionStats.objects.filter(question_id= instance.question_id).update(key_changed_at= timezone.now())
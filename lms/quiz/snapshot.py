@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.db.models import F
+
+from .models import Answer, Question, Quiz, QuizSnapshot
+
+
+# Attempts are delivered and validated from a compiled snapshot of the quiz instead of Question/Answer rows.
+# A snapshot is immutable: quiz.signals moves the quiz to a new snapshot_version on every question or
+# answer change, and an attempt keeps the version it started with (QuizAttempt.snapshot_version).
+# Versions are stored in QuizSnapshot so a pinned one outlives the cache, the cache only saves the query.
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_CACHE_KEY = 'quiz:snapshot:{quiz_id}:v{version}:f%d' % SNAPSHOT_FORMAT
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+
+class CompiledQuiz:
+    """ Read side of a snapshot. Questions are dicts: id, order, text, marks, question_type,
+        answers (list of {id, text}) and correct_answer_ids. """
+
+    def __init__(self, version, data):
+        self.version = version
+        self.questions = data['questions']
+        self._by_order = {question['order']: question for question in self.questions}
+
+    def __len__(self):
+        return len(self.questions)
+
+    def question_at(self, order):
+        return self._by_order.get(order)
+
+    def question_after(self, order):
+        return next((question for question in self.questions if question['order'] > order), None)
+
+
+def build_quiz_snapshot(quiz_id):
+    """ Questions in delivery order with their choices and answer key, two queries. """
+    questions = {
+        question['id']: dict(question, answers= [], correct_answer_ids= [])
+        for question in Question.objects.filter(quiz_id= quiz_id).order_by('order', 'id').values(
+            'id', 'order', 'text', 'marks', 'question_type')
+    }
+    for answer in Answer.objects.filter(question__quiz_id= quiz_id).order_by('id').values(
+            'id', 'question_id', 'text', 'is_correct'):
+        question = questions[answer['question_id']]
+        question['answers'].append({'id': answer['id'], 'text': answer['text']})
+        if answer['is_correct']:
+            question['correct_answer_ids'].append(answer['id'])
+    return {'questions': list(questions.values())}
+
+
+def get_quiz_snapshot(quiz, version= None):
+    """ The compiled quiz at version, the quiz's current snapshot_version by default. A version that was
+        never compiled (eg. attempts started before snapshots existed) falls back to the current one. """
+    if version is None:
+        version = quiz.snapshot_version
+
+    key = SNAPSHOT_CACHE_KEY.format(quiz_id= quiz.id, version= version)
+    data = cache.get(key)
+    if data is None:
+        data = QuizSnapshot.objects.filter(quiz_id= quiz.id, version= version).values_list('data', flat= True).first()
+        if data is None:
+            if version != quiz.snapshot_version:
+                return get_quiz_snapshot(quiz)
+            # Compiled once per version, concurrent first readers all end up with the stored row.
+            data = QuizSnapshot.objects.get_or_create(
+                quiz_id= quiz.id, version= version, defaults= {'data': build_quiz_snapshot(quiz.id)})[0].data
+        cache.set(key, data, timeout= SNAPSHOT_TIMEOUT)
+    return CompiledQuiz(version, data)
+
+
+def get_attempt_snapshot(attempt):
+    return get_quiz_snapshot(attempt.quiz, attempt.snapshot_version)
+
+
+def existing_rows(question_ids, answer_ids= ()):
+    """ The question and answer ids, among those given, whose rows still exist. Answers are written with
+        foreign keys to the live rows, a question or choice deleted since the snapshot was compiled can't
+        be referenced. """
+    questions = set(Question.objects.filter(id__in= question_ids).values_list('id', flat= True))
+    answers = set(Answer.objects.filter(id__in= answer_ids).values_list('id', flat= True)) if answer_ids else set()
+    return questions, answers
+
+
+def bump_snapshot_version(quiz_id= None, question_id= None):
+    """ Moves the quiz to a new snapshot version, attempts already started keep theirs. """
+    if quiz_id is not None:
+        quizzes = Quiz.objects.filter(pk= quiz_id)
+    elif question_id is not None:
+        quizzes = Quiz.objects.filter(questions__id= question_id)
+    else:
+        return
+    quizzes.update(snapshot_version= F('snapshot_version') + 1)
@@ -0,0 +1,18 @@
+from celery import shared_task
+
+from .analytics import analyze_quizzes
+from .expiry import expire_attempts
+
+
+@shared_task
+def task_expire_attempts():
+    """Periodic task that completes and scores, in bulk, the attempts past their time limit or abandoned."""
+    expired = expire_attempts()
+    return f"Quiz attempts expired : {expired}"
+
+
+@shared_task
+def task_analyze_quiz_items():
+    """Periodic task that recomputes the discrimination index of the quizzes answered since the last run."""
+    analyzed = analyze_quizzes()
+    return f"Quizzes analyzed : {analyzed}"
@@ -7,6 +7,7 @@ urlpatterns = [
     # Instructors
     path('lesson/<int:lesson_id>/create/', views.quiz_create, name= 'quiz_create'),
     path('<int:quiz_id>/manage/', views.quiz_manage, name= 'quiz_manage'),
+    path('<int:quiz_id>/analytics/', views.quiz_analytics, name= 'quiz_analytics'),
     path('question/<int:question_id>/answers/', views.answer_manage, name= 'answer_manage'),
 
     path('<int:quiz_id>/grade/', views.grade_quiz, name= 'grade_quiz'),
@@ -15,5 +16,6 @@ urlpatterns = [
     # Students
     path('<int:quiz_id>/start/', views.quiz_start, name= 'quiz_start'),
     path('attempt/<int:attempt_id>/question/<int:question_order>/', views.quiz_take, name= 'quiz_take'),
+    path('attempt/<int:attempt_id>/all/', views.quiz_take_all, name= 'quiz_take_all'),
     path('attempt/<int:attempt_id>/results/', views.quiz_results, name= 'quiz_results')
 ]
\ No newline at end of file
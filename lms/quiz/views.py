@@ -1,14 +1,22 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Max
 from django.core.exceptions import PermissionDenied
 from django.utils import timezone
+from datetime import timedelta
 
-from .models import Quiz, Question, Answer, QuizAttempt, UserAnswer
+from .models import Quiz, Question, Answer, QuizAttempt, UserAnswer, QuestionStats, AnswerStats, CHOICE_QUESTION_TYPES
+from .models import record_manual_grade
 from .forms import QuizForm, QuestionForm, AnswerForm, UserAnswerForm, ShortAnswerForm
+from .services import save_answer, submit_attempt_answers
+from .snapshot import get_attempt_snapshot, get_quiz_snapshot
+from .attempt_store import store_answer
+from .expiry import finish_attempt, is_past_deadline, seconds_left
 from courses.models import Lesson
-from enrollment.models import Enroll
+from enrollment.services import is_enrolled_in
+from courses.resolvers import resolve_lesson, resolve_quiz, resolve_question, resolve_attempt
 
 # Create your views here.
 
@@ -18,7 +26,7 @@ def is_imstructor_of_lesson(user, lesson):
 
 @login_required
 def quiz_create(request, lesson_id):
-    lesson = get_object_or_404(Lesson, id= lesson_id)
+    lesson = resolve_lesson(lesson_id)
     if not is_imstructor_of_lesson(request.user, lesson):
         messages.error(request, 'You are not authorized to add a quiz to this lesson.')
         return redirect('courses:course_details', course_slug= lesson.module.course.slug)
@@ -45,7 +53,7 @@ def quiz_create(request, lesson_id):
 
 @login_required
 def quiz_manage(request, quiz_id):
-    quiz = get_object_or_404(Quiz, id= quiz_id)
+    quiz = resolve_quiz(quiz_id)
     if not is_imstructor_of_lesson(request.user, quiz.lesson):
         messages.error(request, 'You are not authorized to manage this quiz.')
         return redirect('courses:course_details', course_slug= quiz.lesson.module.course.slug)
@@ -71,9 +79,38 @@ def quiz_manage(request, quiz_id):
     return render(request, 'quiz/quiz_manage.html', context)
 
 
+@login_required
+def quiz_analytics(request, quiz_id):
+    """ Difficulty, answer distribution and discrimination of each question. Reads the precomputed stats
+        tables (quiz.analytics) and the quiz snapshot, never the attempts or their answers. """
+    quiz = resolve_quiz(quiz_id)
+    if not is_imstructor_of_lesson(request.user, quiz.lesson):
+        messages.error(request, 'You are not authorized to view this quiz analytics.')
+        return redirect('courses:course_details', course_slug= quiz.lesson.module.course.slug)
+
+    snapshot_questions = get_quiz_snapshot(quiz).questions
+    question_stats = QuestionStats.objects.in_bulk([question['id'] for question in snapshot_questions])
+    answer_stats = AnswerStats.objects.in_bulk(
+        [answer['id'] for question in snapshot_questions for answer in question['answers']])
+
+    questions = []
+    for question in snapshot_questions:
+        stats = question_stats.get(question['id']) or QuestionStats(question_id= question['id'])
+        answers = [
+            {**answer, 'selections': answer_stats[answer['id']].selections if answer['id'] in answer_stats else 0}
+            for answer in question['answers']
+        ]
+        for answer in answers:
+            answer['percent'] = answer['selections'] * 100 / stats.responses if stats.responses else 0
+        questions.append({**question, 'stats': stats, 'answers': answers})
+
+    context = {'quiz': quiz, 'questions': questions, 'page_title': f'Quiz Analytics: {quiz.title}'}
+    return render(request, 'quiz/quiz_analytics.html', context)
+
+
 @login_required
 def answer_manage(request, question_id):
-    question = get_object_or_404(Question, id= question_id)
+    question = resolve_question(question_id)
     quiz = question.quiz
     if not is_imstructor_of_lesson(request.user, quiz.lesson):
         messages.error(request, 'You are not authorized to manage answers for this quiz.')
@@ -101,77 +138,121 @@ def answer_manage(request, question_id):
 
 @login_required
 def quiz_start(request, quiz_id):
-    quiz = get_object_or_404(Quiz, id= quiz_id, is_published= True)
+    quiz = resolve_quiz(quiz_id, is_published= True)
     course = quiz.lesson.module.course
 
-    is_enrolled = Enroll.objects.filter(student= request.user, course= course).exists()
+    is_enrolled = is_enrolled_in(request.user, course)
     if not request.user.is_student or not is_enrolled:
         messages.error(request, "You must be an enrolled student to take this quiz.")
-        return redirect('course:lesson_details', 
+        return redirect('courses:lesson_details', 
                         course_slug= course.slug, module_slug= quiz.lesson.module.slug,lesson_slug= quiz.lesson.slug)
     
     if request.method == 'POST':
-        attempt = QuizAttempt.objects.create(student= request.user, quiz= quiz)
+        # Pinned to the current snapshot, compiled here if this is its first attempt.
+        attempt = QuizAttempt.objects.create(student= request.user, quiz= quiz,
+                                             snapshot_version= get_quiz_snapshot(quiz).version,
+                                             answers_in_cache= quiz.cache_answers)
+        if request.POST.get('mode') == 'all':
+            return redirect('quiz:quiz_take_all', attempt_id= attempt.id)
         return redirect('quiz:quiz_take', attempt_id= attempt.id, question_order= 1)
     
     context = {'quiz': quiz}
-    return render(request, 'quiz/quiz_start_confirm.hmtl', context)
+    return render(request, 'quiz/quiz_start_confirm.html', context)
 
 
 @login_required
 def quiz_take(request, attempt_id, question_order):
-    attempt = get_object_or_404(QuizAttempt, id= attempt_id)
+    attempt = resolve_attempt(attempt_id)
 
     if attempt.student != request.user or attempt.is_completed:
         raise PermissionDenied("You don't have permission to view this page.")
     
-    question = get_object_or_404(Question, quiz= attempt.quiz, order= question_order)
+    if is_past_deadline(attempt):
+        finish_attempt(attempt)
+        messages.info(request, "Time is up, your attempt was submitted.")
+        return redirect('quiz:quiz_results', attempt_id= attempt.id)
+
+    # Questions and choices come from the attempt's pinned quiz snapshot, not from Question/Answer rows.
+    snapshot = get_attempt_snapshot(attempt)
+    question = snapshot.question_at(question_order)
+    if question is None:
+        raise Http404("No such question in this quiz.")
 
     form = None
     if request.method == 'POST':
-        if question.question_type in ['mcq', 'true_false']:
+        if question['question_type'] in CHOICE_QUESTION_TYPES:
             form =  UserAnswerForm(request.POST, question= question)
-            if form.is_valid():
-                selected_answer = form.cleaned_data['answer']
-                UserAnswer.objects.update_or_create(
-                    attempt= attempt,
-                    question= question,
-                    defaults= {'selected_answer': selected_answer},
-                )
-
-        elif question.question_type == 'short_answers':
+            if form.is_valid() and attempt.answers_in_cache:
+                store_answer(attempt.id, question['id'], selected_answer_id= form.cleaned_data['answer'])
+            elif form.is_valid():
+                save_answer(attempt, question['id'], selected_answer_id= form.cleaned_data['answer'])
+
+        elif question['question_type'] == 'short_answers':
             form = ShortAnswerForm(request.POST)
-            if form.is_valid():
-                answer_text = form.cleaned_data['answer_text']
-                UserAnswer.objects.update_or_create(
-                    attempt= attempt,
-                    question= question,
-                    defaults= {'short_answer_text': answer_text}
-                )
+            if form.is_valid() and attempt.answers_in_cache:
+                store_answer(attempt.id, question['id'], short_answer_text= form.cleaned_data['answer_text'])
+            elif form.is_valid():
+                save_answer(attempt, question['id'], short_answer_text= form.cleaned_data['answer_text'])
 
         if form and form.is_valid():
-            next_question = Question.objects.filter(quiz= attempt.quiz, 
-                                                    order__gt= question_order).order_by('order').first()
+            next_question = snapshot.question_after(question_order)
 
-        if next_question:
-            return redirect('quiz:quiz_take', attempt_id= attempt.id, question_order= next_question.order)
-        else:
-            attempt.complete_attempts()
-            return redirect('quiz:quiz_results', attempt_id= attempt.id)
+            if next_question:
+                return redirect('quiz:quiz_take', attempt_id= attempt.id, question_order= next_question['order'])
+            else:
+                finish_attempt(attempt)
+                return redirect('quiz:quiz_results', attempt_id= attempt.id)
         
     else:
-        if question.question_type in ['mcq', 'true_false']:
+        if question['question_type'] in CHOICE_QUESTION_TYPES:
             form = UserAnswerForm(question= question)
-        elif question.question_type == 'short_answers':
+        elif question['question_type'] == 'short_answers':
             form = ShortAnswerForm()
 
-    context= {'attempt': attempt, 'question': question, 'form': form, 'page_title': f"Question {question.order}"}
+    context= {'attempt': attempt, 'question': question, 'question_count': len(snapshot), 'form': form,
+              'seconds_left': seconds_left(attempt), 'page_title': f"Question {question['order']}"}
     return render(request, 'quiz/quiz_take.html', context)
 
 
+@login_required
+def quiz_take_all(request, attempt_id):
+    """ Every question on one page, submitted and scored together (quiz.services.submit_attempt_answers). """
+    attempt = resolve_attempt(attempt_id)
+
+    if attempt.student != request.user or attempt.is_completed:
+        raise PermissionDenied("You don't have permission to view this page.")
+
+    if is_past_deadline(attempt):
+        finish_attempt(attempt)
+        messages.info(request, "Time is up, your attempt was submitted.")
+        return redirect('quiz:quiz_results', attempt_id= attempt.id)
+
+    submitted, errors = {}, {}
+    if request.method == 'POST':
+        submitted = {
+            int(key.removeprefix('question_')): value.strip()
+            for key, value in request.POST.items()
+            if key.startswith('question_') and key.removeprefix('question_').isdigit()
+        }
+        # Sent when the time ran out (in the grace period): whatever was answered is kept.
+        errors = submit_attempt_answers(attempt.id, submitted, allow_missing= is_past_deadline(attempt, grace= timedelta()))
+        if not errors:
+            return redirect('quiz:quiz_results', attempt_id= attempt.id)
+        messages.error(request, "Please answer every question.")
+
+    questions = [
+        dict(question, submitted= str(submitted.get(question['id'], '')), error= errors.get(question['id']))
+        for question in get_attempt_snapshot(attempt).questions
+    ]
+
+    context = {'attempt': attempt, 'questions': questions, 'seconds_left': seconds_left(attempt),
+               'page_title': attempt.quiz.title}
+    return render(request, 'quiz/quiz_take_all.html', context)
+
+
 @login_required
 def quiz_results(request, attempt_id):
-    attempt = get_object_or_404(QuizAttempt, id= attempt_id)
+    attempt = resolve_attempt(attempt_id)
 
     if attempt.student != request.user:
         raise PermissionDenied("You can't view there results.")
@@ -186,7 +267,7 @@ def quiz_results(request, attempt_id):
 
 @login_required
 def grade_quiz(request, quiz_id):
-    quiz = get_object_or_404(Quiz, id= quiz_id)
+    quiz = resolve_quiz(quiz_id)
     course = quiz.lesson.module.course
 
     if request.user != course.instructor:
@@ -206,8 +287,9 @@ def grade_quiz(request, quiz_id):
 
 @login_required
 def mark_answer_correct(request, user_answer_id):
-    if request.user == 'POST':
-        user_answer = get_object_or_404(UserAnswer, id= user_answer_id)
+    if request.method == 'POST':
+        user_answer = get_object_or_404(
+            UserAnswer.objects.select_related('attempt__quiz__lesson__module__course'), id= user_answer_id)
         quiz = user_answer.attempt.quiz
         course = quiz.lesson.module.course
 
@@ -215,9 +297,12 @@ def mark_answer_correct(request, user_answer_id):
             messages.error(request, "You are not authorized to perform this action.")
             return redirect('users:instructor_dashboard')
         
+        newly_correct = not user_answer.is_correct_manual and user_answer.attempt.is_completed
         user_answer.is_correct_manual = True
         user_answer.graded_at = timezone.now()
         user_answer.save()
+        if newly_correct:
+            record_manual_grade(user_answer.question_id)
 
         user_answer.attempt.recalculate_and_save()
         messages.success(request, "Amswer marked as correct and score updated.")
@@ -0,0 +1,77 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from courses.models import Course, Module, Lesson
+from enrollment.models import Enroll
+from users.models import Notification
+from users.services import create_notification, bulk_create_notifications, NOTIFICATION_BATCH_SIZE
+from users.tasks import (enrolled_student_ids, student_id_ranges, new_lesson_message,
+                         NOTIFICATION_FANOUT_CHUNK)
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Measures new lesson notification throughput, per-row inserts against the bulk fan-out."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--enrollments', type= int, nargs= '+', default= [10000, 100000],
+                            help= "Course sizes to benchmark (synthetic rows are rolled back).")
+        parser.add_argument('--legacy-sample', type= int, default= 2000,
+                            help= "Students timed with the old per-row path, extrapolated to the course size.")
+
+    def handle(self, *args, **options):
+        for size in options['enrollments']:
+            with transaction.atomic():
+                lesson, course = self.seed_course(size)
+                message = new_lesson_message(lesson, course)
+
+                sample = list(enrolled_student_ids(course.id)[:options['legacy_sample']])
+                start = time.perf_counter()
+                for user_id in sample:
+                    create_notification(user_id= user_id, message= message, related_lesson= lesson)
+                legacy = (time.perf_counter() - start) / max(len(sample), 1)
+                Notification.objects.filter(related_lesson= lesson).delete()
+
+                # Same work the task and its sub-tasks do, run one range after another in this process.
+                start = time.perf_counter()
+                ranges = student_id_ranges(enrolled_student_ids(course.id), NOTIFICATION_FANOUT_CHUNK)
+                sent = 0
+                for first, last in ranges:
+                    student_ids = enrolled_student_ids(course.id).filter(student_id__gte= first, student_id__lte= last)
+                    sent += bulk_create_notifications(student_ids.iterator(chunk_size= NOTIFICATION_BATCH_SIZE),
+                                                      message, related_lesson_id= lesson.id)
+                bulk = time.perf_counter() - start
+
+                self.stdout.write(
+                    f"{size} enrollments : per-row {legacy * size:.1f} s ({1 / legacy:,.0f} rows/s, "
+                    f"from {len(sample)} rows), bulk {bulk:.2f} s ({sent / bulk:,.0f} rows/s) "
+                    f"in {len(ranges)} sub-task range(s) on one worker"
+                )
+
+                # Never keep the synthetic rows.
+                transaction.set_rollback(True)
+
+    def seed_course(self, size):
+        password = make_password(None)
+        instructor = User.objects.create(username= 'benchmark-instructor', email= 'benchmark-instructor@example.com',
+                                         is_instructor= True, password= password)
+        course = Course.objects.create(title= 'Benchmark', slug= 'benchmark-notifications',
+                                       instructor= instructor, is_published= True)
+        module = Module.objects.create(course= course, title= 'Benchmark', order= 1)
+        lesson = Lesson.objects.create(module= module, title= 'Benchmark', order= 1, is_published= True)
+
+        students = User.objects.bulk_create([
+            User(username= f'benchmark-{i}', email= f'benchmark-{i}@example.com', is_student= True, password= password)
+            for i in range(size)
+        ], batch_size= 5000)
+        Enroll.objects.bulk_create([Enroll(student= student, course= course) for student in students], batch_size= 5000)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Enroll._meta.db_table}')
+        return lesson, course
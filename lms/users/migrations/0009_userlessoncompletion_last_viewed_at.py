@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_remove_profile_profile_pic_profile_avatar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userlessoncompletion',
+            name='last_viewed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
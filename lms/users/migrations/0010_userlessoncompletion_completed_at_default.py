@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:53
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_userlessoncompletion_last_viewed_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userlessoncompletion',
+            name='completed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
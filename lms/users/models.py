@@ -4,6 +4,7 @@ from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
+from django.utils import timezone
 import uuid
 import os
 
@@ -81,7 +82,10 @@ class UserLessonCompletion(models.Model):
 
     lesson = models.ForeignKey(Lesson, on_delete= models.CASCADE, related_name= 'user_completions')
     is_completed = models.BooleanField(default= False)
-    completed_at = models.DateTimeField(auto_now_add= True)
+    # Not auto_now_add, the bulk sync api (enrollment.services.sync_lesson_completions) stores the client's time.
+    completed_at = models.DateTimeField(default= timezone.now)
+    # Written in bulk from the lesson view buffer (courses/tracking.py), not on the request.
+    last_viewed_at = models.DateTimeField(null= True, blank= True)
 
     class Meta:
         unique_together= ('student', 'lesson')
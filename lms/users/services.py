@@ -2,10 +2,13 @@ from .models import Notification, MemberUser
 from courses.models import Course, Lesson
 from enrollment.models import Enroll
 from django.contrib.auth import get_user_model
+from itertools import islice
 
 
 User = get_user_model()
 
+NOTIFICATION_BATCH_SIZE = 1000
+
 
 def create_notification(user_id, message, related_course= None, related_lesson= None):
     try:
@@ -20,11 +23,26 @@ def create_notification(user_id, message, related_course= None, related_lesson=
         pass
 
 
+def bulk_create_notifications(user_ids, message, related_course_id= None, related_lesson_id= None,
+                              batch_size= NOTIFICATION_BATCH_SIZE):
+    """ Writes one notification per user id with a bulk INSERT per batch, returns how many were created. """
+    user_ids = iter(user_ids)
+    created = 0
+    while batch := list(islice(user_ids, batch_size)):
+        Notification.objects.bulk_create([
+            Notification(user_id= user_id, message= message,
+                         related_course_id= related_course_id, related_lesson_id= related_lesson_id)
+            for user_id in batch
+        ])
+        created += len(batch)
+    return created
+
+
 def notify_new_lesson(new_lesson, course):
-    enrolled_user = [course_enrollment.student for course_enrollment in Enroll.objects.filter(course= course)]
     message = f"A new lesson '{new_lesson.title}' has been added to this course '{course.title}'."
-    for user in enrolled_user:
-        create_notification(user= user, message= message, related_lesson= new_lesson)
+    student_ids = Enroll.objects.filter(course= course).values_list('student_id', flat= True)
+    bulk_create_notifications(student_ids.iterator(chunk_size= NOTIFICATION_BATCH_SIZE), message,
+                              related_lesson_id= new_lesson.id)
 
 
 def notify_new_enrollment(student, course):
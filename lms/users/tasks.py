@@ -0,0 +1,63 @@
+from celery import shared_task, group
+
+from .services import bulk_create_notifications, NOTIFICATION_BATCH_SIZE
+from courses.models import Lesson
+from enrollment.models import Enroll
+
+
+# Courses with more enrollments than this are split into parallel sub-tasks of this many students.
+NOTIFICATION_FANOUT_CHUNK = 10000
+
+
+def new_lesson_message(lesson, course):
+    return f"A new lesson '{lesson.title}' has been added to the course '{course.title}'."
+
+
+def enrolled_student_ids(course_id):
+    return Enroll.objects.filter(course_id= course_id).order_by('student_id').values_list('student_id', flat= True)
+
+
+def student_id_ranges(student_ids, chunk_size):
+    """ Inclusive (first, last) bounds of chunk_size of the sorted ids each. Keyset paged (student_id > last
+        bound), a few index lookups per range, the ids themselves are only read by the sub-tasks. """
+    ranges = []
+    last = None
+    while True:
+        page = student_ids if last is None else student_ids.filter(student_id__gt= last)
+        first = page.first()
+        if first is None:
+            return ranges
+        last = next(iter(page[chunk_size - 1:chunk_size]), None) or page.last()
+        ranges.append((first, last))
+
+
+@shared_task
+def task_notify_new_lesson(lesson_id, course_id):
+    """Asynchronous task to send notifications when a new lesson is added."""
+    try:
+        lesson = Lesson.objects.select_related('module__course').get(id= lesson_id, module__course_id= course_id)
+    except Lesson.DoesNotExist:
+        return "Lesson or Course not found."
+
+    message = new_lesson_message(lesson, lesson.module.course)
+    student_ids = enrolled_student_ids(course_id)
+    ranges = student_id_ranges(student_ids, NOTIFICATION_FANOUT_CHUNK)
+
+    if len(ranges) <= 1:
+        sent = bulk_create_notifications(student_ids.iterator(chunk_size= NOTIFICATION_BATCH_SIZE),
+                                         message, related_lesson_id= lesson_id)
+        return f"Notifications sent for lesson {lesson.title} : {sent}"
+
+    group(
+        task_notify_new_lesson_range.s(lesson_id, course_id, message, first, last) for first, last in ranges
+    ).apply_async()
+    return f"Notifications for lesson {lesson.title} split into {len(ranges)} sub-tasks"
+
+
+@shared_task
+def task_notify_new_lesson_range(lesson_id, course_id, message, first_student_id, last_student_id):
+    """Notifies the enrolled students with ids in [first_student_id, last_student_id]."""
+    student_ids = enrolled_student_ids(course_id).filter(
+        student_id__gte= first_student_id, student_id__lte= last_student_id)
+    return bulk_create_notifications(student_ids.iterator(chunk_size= NOTIFICATION_BATCH_SIZE),
+                                     message, related_lesson_id= lesson_id)
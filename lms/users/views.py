@@ -4,8 +4,7 @@ from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.urls import reverse_lazy
-from django.db.models import F, Count, OuterRef, Subquery, Avg
-from django.db.models.functions import Coalesce
+from django.db.models import F, Avg, Sum
 from django.contrib.auth import get_user_model, update_session_auth_hash
 
 from .forms import MemberUserChangeForm, MemberUserCreation, UserUpdateForm, ProfileUpdateForm
@@ -97,8 +96,9 @@ def profile(request):
         # Calculate instructor stats
         total_student_qs = Enroll.objects.filter(course__instructor= user).values('student').distinct()
         profile_stats['Total Students'] = total_student_qs.count()
-        profile_stats['Average Rating'] = Review.objects.filter(
-            course__instructor= user).aggregate(avg_rating= Avg('rating'))['avg_rating'] or 0
+        # Uses the per course rating aggregates instead of scanning every review.
+        ratings = user_content.aggregate(total= Sum('rating_sum'), count= Sum('rating_count'))
+        profile_stats['Average Rating'] = round(ratings['total'] / ratings['count'], 1) if ratings['count'] else 0
         
     elif request.user.is_student:
         user_content = Review.objects.filter(student= user)
@@ -137,26 +137,10 @@ def student_dashboard(request):
         messages.warning(request, "This page is only for students.")
         return redirect('users:profile')
     
-    # Base queryset for all of the users enrollments.
-    enrollments = Enroll.objects.filter(student= request.user)
-
-    # Subquery to count total lessons foe each course.
-    total_lessons_sq = Lesson.objects.filter(
-        module__course= OuterRef('course')
-    ).values('module__course').annotate(count= Count('id')).values('count')
-
-    # Subquery to count completed lessons for user in each course.
-    completed_lesson_sq = UserLessonCompletion.objects.filter(
-        student= request.user,
-        lesson__module__course= OuterRef('course'),
-        is_completed= True,
-    ).values('lesson__module__course').annotate(count= Count('id')).values('count')
-
-    # Annotate the main queryset with the count from out aubqueries.
-    enrollments = enrollments.annotate(
-        total_lessons = Coalesce(Subquery(total_lessons_sq), 0),
-        completed_lessons = Coalesce(Subquery(completed_lesson_sq), 0),
-    ).select_related('course')
+    # Progress comes from the counters stored on each enrollment and "Continue learning" from the stored
+    # next lesson pointer, so the whole dashboard is this one query.
+    enrollments = Enroll.objects.filter(student= request.user).select_related(
+        'course__instructor', 'next_lesson__module')
 
     context= {'enrolled_courses': enrollments, 
               'page_title': 'My Learning Dashboard'}